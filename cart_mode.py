@@ -10,18 +10,23 @@ from PIL import Image, ImageTk
 import gspread
 from google.oauth2.service_account import Credentials
 
-from config import WINDOW_W, WINDOW_H, GS_CRED_PATH, GS_SHEET_NAME, GS_TAB, CRED_DIR
+from config import (WINDOW_W, WINDOW_H, GS_CRED_PATH, GS_SHEET_NAME, GS_TAB, CRED_DIR,
+                    GS_SCANS_TAB)
 from modes.base_mode import BaseMode
-from utils.upc_helpers import upc_variants_from_scan, upc_variants_from_sheet
+from utils.catalog import get_catalog
+from utils.txn_ids import get_txn_allocator
+from utils.upload_queue import get_upload_queue
 
 class CartMode(BaseMode):
     """
     Shopping cart mode for adding and managing items.
     Displays Cart.png as background with receipt recorder and totals.
     """
-    def __init__(self, root, **kwargs):
+    def __init__(self, root, catalog=None, uploads=None, **kwargs):
         """Initialize the CartMode."""
         super().__init__(root)
+        self.catalog = catalog or get_catalog()  # shared with PriceCheck; swapped on refresh
+        self.uploads = uploads or get_upload_queue()  # Scans rows, sent in the background
         
         # Define cache directory
         self.cache_dir = Path.home() / "SelfCheck" / "Cache"
@@ -37,8 +42,7 @@ class CartMode(BaseMode):
             logging.warning("Drive service not found in CartMode initialization")
         
         # Cart data structures
-        self.cart_items = {}  # UPC -> {data, qty}
-        self.upc_catalog = {}  # UPC -> row data
+        self.cart_items = {}  # catalog key -> {data, qty}
         self.transaction_id = self._generate_transaction_id()
         self.current_payment_method = None
         
@@ -75,18 +79,9 @@ class CartMode(BaseMode):
         self.barcode_buffer = ""
         self.root.bind("<Key>", self._on_key)
         
-        # Load UPC catalog and config files
-        self._load_upc_catalog()
+        # Load config files (the catalog is the shared, already-loaded service)
         self._load_config_files()
         
-        # Test Google Sheets access
-        self.sheets_access_ok = self.test_sheet_access()
-        if self.sheets_access_ok:
-            logging.info("Google Sheets access test passed")
-        else:
-            logging.warning("Google Sheets access test failed - logging to Service tab may not work")
-            # Check permissions to help diagnose the issue
-            self.check_spreadsheet_permissions()
         
         # Callback to be set by main app
         self.on_exit = None
@@ -250,54 +245,43 @@ class CartMode(BaseMode):
         logging.info(f"Cart: Scanning item {upc}")
         self._on_activity()
         
+        # Look up UPC in the shared catalog (one canonical key per product)
+        key, product = self.catalog.lookup(upc)
+        self.uploads.enqueue(GS_SCANS_TAB, [time.strftime("%Y-%m-%d %H:%M:%S"), upc, key,
+                                            "found" if product else "unknown"])
+        if not product:
+            self._show_error(f"Item not found: {upc}")
+            return False
+
         # Check if we've reached the maximum number of different items
-        if len(self.cart_items) >= 15 and upc not in self.cart_items:
+        if len(self.cart_items) >= 15 and key not in self.cart_items:
             self._show_error("Maximum number of different items reached (15)")
             return False
             
-        # Look up UPC in catalog
-        row = self.upc_catalog.get(upc)
-        if not row:
-            # Try variants
-            for variant in upc_variants_from_scan(upc):
-                row = self.upc_catalog.get(variant)
-                if row:
-                    break
-                    
-        if not row:
-            self._show_error(f"Item not found: {upc}")
-            return False
-            
         # Check if item is already in cart
-        if upc in self.cart_items:
+        if key in self.cart_items:
             # Check if we've reached the maximum quantity for this item
-            if self.cart_items[upc]["qty"] >= 10:
+            if self.cart_items[key]["qty"] >= 10:
                 self._show_error(f"Maximum quantity reached for this item (10)")
                 return False
                 
             # Increment quantity
-            self.cart_items[upc]["qty"] += 1
+            self.cart_items[key]["qty"] += 1
         else:
-            # Add new item to cart
-            try:
-                # Extract relevant data from row
-                name = f"{row[1]} {row[2]} {row[4]}"  # Brand (B=1), Name (C=2), Size (E=4)
-                price = float(row[8].replace('$', '').strip())  # Price (I=8)
-                taxable = row[9].strip().lower() == 'yes'  # Taxable (J=9)
-                image = row[11] if len(row) > 11 else ""  # Image (L=11)
-                
-                self.cart_items[upc] = {
-                    "name": name,
-                    "price": price,
-                    "taxable": taxable,
-                    "image": image,
-                    "qty": 1,
-                    "row": row
-                }
-            except (IndexError, ValueError) as e:
-                logging.error(f"Error processing item data: {e}")
+            # Price and tax flag were parsed once when the catalog was indexed
+            if product.price_cents is None:
+                logging.error(f"Cart: no usable price for {key}: {product.price_text!r}")
                 self._show_error(f"Error processing item data")
                 return False
+
+            self.cart_items[key] = {
+                "name": product.display_name,
+                "price_cents": product.price_cents,
+                "taxable": product.taxable,
+                "image": product.image,
+                "qty": 1,
+                "product": product
+            }
                 
         # Update UI
         self._update_receipt()
@@ -307,41 +291,7 @@ class CartMode(BaseMode):
     def _generate_transaction_id(self):
         """Generate a unique transaction ID in format YYDDD###."""
         try:
-            from datetime import datetime
-            
-            # Get current date components
-            now = datetime.now()
-            year_last_two = int(now.strftime("%y"))  # Convert to int first
-            day_of_year = int(now.strftime("%j"))    # Convert to int first
-            
-            # Get the current transaction count for today
-            transaction_count_file = Path.home() / "SelfCheck" / "Logs" / f"transaction_count_{year_last_two:02d}{day_of_year:03d}.txt"
-            
-            # Create directory if it doesn't exist
-            transaction_count_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            # Get current count or start at 0
-            current_count = 0
-            if transaction_count_file.exists():
-                try:
-                    with open(transaction_count_file, 'r') as f:
-                        current_count = int(f.read().strip())
-                except (ValueError, IOError) as e:
-                    logging.error(f"Error reading transaction count: {e}")
-            
-            # Increment count
-            new_count = current_count + 1
-            
-            # Save new count
-            try:
-                with open(transaction_count_file, 'w') as f:
-                    f.write(str(new_count))
-            except IOError as e:
-                logging.error(f"Error saving transaction count: {e}")
-            
-            # Format transaction ID: YYDDD### (e.g., 25236001)
-            transaction_id = f"{year_last_two:02d}{day_of_year:03d}{new_count:03d}"
-            
+            transaction_id = get_txn_allocator().next_id()
             logging.info(f"Generated transaction ID: {transaction_id}")
             return transaction_id
             
@@ -370,11 +320,6 @@ class CartMode(BaseMode):
             except (json.JSONDecodeError, ValueError) as e:
                 logging.error(f"Error reloading tax rate: {e}")
 
-    def _load_upc_catalog(self):
-        """Load UPC catalog from CSV file and update Tax.json from spreadsheet."""
-        # Implementation details omitted for brevity
-        pass
-
     def _show_error(self, message):
         """Show an error message."""
         # Simple messagebox for now
@@ -1,10 +1,9 @@
 # components/admin_login.py
 import tkinter as tk
 import logging
-import gspread
-from google.oauth2.service_account import Credentials
 
-from config import GS_CRED_PATH, GS_SHEET_NAME, GS_LOGIN_TAB
+from config import GS_LOGIN_TAB
+from utils.google_session import get_session
 
 class AdminLoginScreen:
     """Login screen for Admin mode with virtual keyboard."""
@@ -224,41 +223,8 @@ class AdminLoginScreen:
 
     def _verify_credentials(self, username, password):
         try:
-            # Connect to Google Sheet with expanded scopes
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-                "https://www.googleapis.com/auth/drive.readonly",
-                "https://www.googleapis.com/auth/spreadsheets",
-            ]
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            gc = gspread.authorize(creds)
-
-            # Get login tab
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_LOGIN_TAB)
-
-            # Get all usernames and passwords (skip header row)
-            users = sheet.col_values(1)[1:]  # Column A (usernames)
-            passes = sheet.col_values(2)[1:]  # Column B (passwords)
-
-            # Check credentials
-            for i, user in enumerate(users):
-                if user == username and i < len(passes) and passes[i] == password:
-                    logging
-
-# components/admin_login.py (continued)
-    def _verify_credentials(self, username, password):
-        try:
-            # Connect to Google Sheet with expanded scopes
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-                "https://www.googleapis.com/auth/drive.readonly",
-                "https://www.googleapis.com/auth/spreadsheets",
-            ]
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            gc = gspread.authorize(creds)
-
-            # Get login tab
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_LOGIN_TAB)
+            # Get login tab from the shared session
+            sheet = get_session().worksheet(GS_LOGIN_TAB)
 
             # Get all usernames and passwords (skip header row)
             users = sheet.col_values(1)[1:]  # Column A (usernames)
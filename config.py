@@ -2,7 +2,6 @@
 import os
 import logging
 from pathlib import Path
-import RPi.GPIO as GPIO
 
 # ==============================
 #           LOGGING
@@ -28,11 +27,20 @@ IDLE_DIR = Path.home() / "SelfCheck" / "IdlePics"
 IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp"}
 SLIDE_MS = 20_000  # 20s
 
+# Credentials tab settings cache lifetime (see utils/settings.py)
+SETTINGS_TTL_S = 15 * 60  # 15 minutes
+
 # Weather update interval
 WEATHER_UPDATE_INTERVAL = 30 * 60  # 30 minutes in seconds
 
-# GPIO Configuration
-GPIO.setmode(GPIO.BCM)
+# Boot: Idle must be on screen within this budget; network sync runs afterwards
+BOOT_PAINT_BUDGET_MS = 2_000
+
+# Background catalog refresh (see utils/catalog_refresher.py)
+CATALOG_REFRESH_INTERVAL_S = 15 * 60  # 15 minutes while the store is open
+CATALOG_MAX_STALE_S = 4 * 60 * 60     # refresh even in quiet hours past 4 hours
+
+# GPIO Configuration (pins are set up by utils.hardware.init_gpio())
 
 # Button pins
 PIN_RED    = 5   # Exit PriceCheck -> Idle
@@ -41,24 +49,70 @@ PIN_YELLOW = 12  # Available
 PIN_BLUE   = 13  # Available
 PIN_CLEAR  = 16  # Enter Admin mode
 
-# Setup with pull-up resistors
-GPIO.setup(PIN_RED,    GPIO.IN, pull_up_down=GPIO.PUD_UP)
-GPIO.setup(PIN_GREEN,  GPIO.IN, pull_up_down=GPIO.PUD_UP)
-GPIO.setup(PIN_YELLOW, GPIO.IN, pull_up_down=GPIO.PUD_UP)
-GPIO.setup(PIN_BLUE,   GPIO.IN, pull_up_down=GPIO.PUD_UP)
-GPIO.setup(PIN_CLEAR,  GPIO.IN, pull_up_down=GPIO.PUD_UP)
-
 # PriceCheck assets & layout
 SYSPICS_DIR   = Path.home() / "SelfCheck" / "SysPics"
 PRICE_BG_PATH = SYSPICS_DIR / "PriceCheck.png"
 
 # Google Drive folder ID for product images
 GDRIVE_FOLDER_ID = "1lbYM1WBgqvPwiRwvluJnVyKRawQgl5LU"
+# Decoded, pre-scaled product images kept in memory (see utils/image_lru.py)
+IMAGE_LRU_MAX_BYTES = 32 * 1024 * 1024
+# Downloaded product images on disk (see utils/disk_cache.py)
+IMAGE_CACHE_DIR = Path.home() / "SelfCheck" / "ImageCache"
+IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024  # evicted down to 90% once over budget
+IMAGE_CACHE_POLICY = "lru"                  # "lru" or "lfu"
+# Background download of catalog images after each sync (see utils/image_prefetch.py)
+IMAGE_PREFETCH_WORKERS = 2
+IMAGE_PREFETCH_MAX_BPS = 512 * 1024         # shared by all workers; 0 = uncapped
+IMAGE_PREFETCH_CHUNK_BYTES = 256 * 1024     # prefetch downloads are throttled per chunk
+# Drive image folder listing + Changes page token (see utils/drive_file_map.py)
+DRIVE_FILE_MAP_PATH = CRED_DIR / "drive_file_map.json"
 
 GS_CRED_PATH  = Path.home() / "SelfCheck" / "Cred" / "credentials.json"
 GS_SHEET_NAME = "Inventory1001"
 GS_TAB        = "Inv"
 
+# Local catalog snapshot, served at startup before the sheet is reachable
+UPC_CATALOG_PATH = CRED_DIR / "upc_catalog.csv"
+# Compiled, memory-mapped form of the snapshot (see utils/compiled_catalog.py)
+UPC_CATALOG_BIN_PATH = CRED_DIR / "upc_catalog.bin"
+# SQLite copy of the snapshot with name search (see utils/catalog_db.py)
+UPC_CATALOG_DB_PATH = CRED_DIR / "upc_catalog.db"
+# Key collisions / invalid check digits found while indexing the catalog
+UPC_KEY_REPORT_PATH = CRED_DIR / "upc_key_report.csv"
+# Scans that matched nothing, aggregated per UPC for admins to fix the sheet
+UNKNOWN_SCANS_PATH = CRED_DIR / "unknown_scans.csv"
+UNKNOWN_SCANS_FLUSH_S = 30       # at most one rewrite of the file per 30s
+GS_UNKNOWN_TAB = "Unknown Scans" # Tab the admin export writes to
+# Opening hours downloaded from the Hours tab; closed hours are refresh quiet hours
+STORE_HOURS_PATH = CRED_DIR / "store_hours.csv"
+NEGATIVE_CACHE_SIZE = 256        # recent unknown keys answered without an index probe
+
+# Append-only sales journal (see utils/journal.py)
+JOURNAL_DIR = CRED_DIR / "journal"
+JOURNAL_SEGMENT_BYTES = 4 * 1024 * 1024  # rotate (and gzip the old segment) at 4 MiB
+JOURNAL_COMMIT_INTERVAL_S = 1.0          # group commit window: one fsync per second at most
+# Per-day transaction ID sequence (see utils/txn_ids.py)
+TXN_SEQ_DB_PATH = CRED_DIR / "txn_seq.db"
+# Where the old per-day transaction_count_YYDDD.txt files were kept
+LEGACY_TXN_COUNT_DIR = Path.home() / "SelfCheck" / "Logs"
+
+# Outbound rows for Sheets, persisted until uploaded (see utils/upload_queue.py)
+UPLOAD_QUEUE_PATH = CRED_DIR / "upload_queue.db"
+UPLOAD_BATCH_SIZE = 200          # rows per append_rows call
+UPLOAD_FLUSH_INTERVAL_S = 10     # upload queued rows every 10s
+UPLOAD_BACKOFF_MAX_S = 600       # retry delay doubles while offline, up to 10 min
+UPLOAD_QUEUE_MAX_ROWS = 100_000  # oldest rows are dropped (with a warning) beyond this
+UPLOAD_QUEUE_MAX_AGE_S = 30 * 24 * 3600  # ... or once they are 30 days old
+GS_SALES_TAB   = "Sales"
+GS_SCANS_TAB   = "Scans"
+GS_SERVICE_TAB = "Service"
+MACHINE_ID = "Prototype1001"     # identifies this kiosk in Service tab rows
+
+# Sold quantities not yet subtracted from the Inv tab QTY column (see utils/stock_writeback.py)
+STOCK_PENDING_PATH = CRED_DIR / "stock_pending.json"
+STOCK_PUSH_INTERVAL_S = 60       # one read + one batch_update of QTY per minute at most
+
 # Updated layout boxes for 1280x1024 resolution
 # Scaled up from original 800x480 resolution
 PC_BLUE_BOX  = (32, 357, 704, 777)     # Scaled from (20, 170, 440, 370)
@@ -3,57 +3,81 @@
 # Main entry point for SelfCheck application
 
 import os
+import time
 import logging
 import tkinter as tk
 import json
-import csv
 from pathlib import Path
-import RPi.GPIO as GPIO
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-import gspread
+
+# Time every import below; reported once Idle is on screen
+from utils.startup_profiler import profiler
+profiler.install_import_hook()
 
 from config import WINDOW_W, WINDOW_H, PIN_RED, PIN_GREEN, PIN_CLEAR
-from config import GS_CRED_PATH, GS_SHEET_NAME, GS_TAB, CRED_DIR
+from config import GS_CRED_PATH, GS_SHEET_NAME, CRED_DIR
+from config import BOOT_PAINT_BUDGET_MS
 from modes.idle_mode import IdleMode
 from modes.price_check_mode import PriceCheckMode
 from modes.admin_mode import AdminMode
 from modes.cart_mode import CartMode
+from utils.google_session import get_session
+from utils.catalog import get_catalog
+from utils.settings import get_settings_store
+from utils.background import BackgroundWorker
+from utils.catalog_refresher import CatalogRefresher
+from utils.journal import get_journal
+from utils.upload_queue import get_upload_queue
+from utils.stock_writeback import StockWriteback
+from utils.disk_cache import get_disk_cache
+from utils.image_prefetch import ImagePrefetcher
+from utils.boot import BootPipeline, FAILED
+from utils.hardware import init_gpio
 
 class App:
     def __init__(self):
+        self.boot_started_ts = time.monotonic()
+        profiler.mark("imports done")
+
         # GUI
-        self.root = tk.Tk()
-        self.root.attributes("-fullscreen", True)
-        # Enable cursor for touch development
-        self.root.config(cursor="arrow")  # Show cursor during development
-        self.root.configure(bg="black")
-        self.root.bind("<Escape>", lambda e: self.shutdown())
-
-        # Initialize Google Drive service
-        self.drive_service = None
-        self.sheets_service = None
-        self.init_google_services()
-        
-        # Attach services to root for access by all modes
-        self.root.drive_service = self.drive_service
-        self.root.sheets_service = self.sheets_service
-        
-        # Download UPC catalog and update tax rate at startup
-        self.update_upc_catalog_and_tax_rate()
+        with profiler.stage("tk root"):
+            self.root = tk.Tk()
+            self.root.attributes("-fullscreen", True)
+            # Enable cursor for touch development
+            self.root.config(cursor="arrow")  # Show cursor during development
+            self.root.configure(bg="black")
+            self.root.bind("<Escape>", lambda e: self.shutdown())
+
+        # Offline-first catalog shared by every mode: index the last local snapshot now,
+        # refresh from Sheets later
+        with profiler.stage("catalog snapshot"):
+            self.catalog = get_catalog()
+
+        # Background worker for all network sync; results come back on the Tk thread
+        self.worker = BackgroundWorker(self.root, name="sync")
+        self.boot = BootPipeline(self.worker)
+        # Periodic catalog refresh; started once the boot sync has settled
+        self.refresher = CatalogRefresher(self.root, self.worker, self.catalog)
+        self.sync_status = ""
 
         # Hide the cursor
         self.hide_cursor()
 
-        # Modes
-        self.idle = IdleMode(self.root)
-        self.price = PriceCheckMode(self.root)
-        self.admin = AdminMode(self.root)
-        self.mode = None
-        self.cart = CartMode(self.root)
+        # Modes (local assets only - nothing here may touch the network)
+        with profiler.stage("modes"):
+            self.idle = IdleMode(self.root, worker=self.worker)
+            self.price = PriceCheckMode(self.root, catalog=self.catalog, worker=self.worker, boot=self.boot)
+            self.admin = AdminMode(self.root, catalog=self.catalog, refresher=self.refresher)
+            self.mode = None
+            self.journal = get_journal()
+            self.uploads = get_upload_queue()
+            self.stock = StockWriteback(self.catalog)
+            self.cart = CartMode(self.root, catalog=self.catalog, journal=self.journal,
+                                 uploads=self.uploads, stock=self.stock)
 
-        # Buttons -> callbacks
-        GPIO.setmode(GPIO.BCM)
+        # Buttons -> callbacks (explicit hardware init; config no longer touches GPIO)
+        with profiler.stage("gpio"):
+            self.gpio = init_gpio()
+        GPIO = self.gpio
 
         # Button pins
         self.PIN_RED = PIN_RED     # exit modes -> Idle
@@ -78,6 +102,55 @@ class App:
         self.idle.on_cart_action = lambda: self.set_mode("Cart")
         self.cart.on_exit = lambda: self.set_mode("Idle")
 
+        # Download catalog images in the background after each sync
+        self.prefetcher = ImagePrefetcher(self.price.image_loader, self.catalog)
+        self.prefetcher.on_progress = lambda p: self.worker.post(self._on_prefetch_progress, p)
+        self.refresher.on_refreshed = lambda count: self.worker.submit(self._refresh_images)
+
+        self._build_boot_pipeline()
+
+    def _build_boot_pipeline(self):
+        """Network sync stages, run in order on the background worker after Idle is shown."""
+        self.boot.add_stage("google", self.init_google_services)
+        # Download UPC catalog and update tax rate; the new index is swapped in atomically
+        self.boot.add_stage("catalog", self.update_upc_catalog_and_tax_rate)
+        # Type-ahead index for cart manual entry (no-op if the catalog refresh built it)
+        self.boot.add_stage("search", self.catalog.prepare_search)
+        self.boot.add_stage("images", self.price.image_loader.refresh)
+        self.boot.on_progress = self._on_boot_progress
+        self.boot.on_finished = self._on_boot_finished
+
+    def _on_boot_progress(self, name, state, index, total):
+        self.idle.set_sync_status(f"Syncing {name}... ({index}/{total})")
+
+    def _on_boot_finished(self, status):
+        failed = [name for name, state in status.items() if state == FAILED]
+        if failed:
+            self.sync_status = f"Offline - using local data ({', '.join(failed)})"
+        else:
+            self.sync_status = ""
+        self.idle.set_sync_status(self.sync_status)
+        self.refresher.start()
+        self.uploads.start()
+        self.stock.start()
+        if "images" not in failed:
+            self.worker.submit(self.prefetcher.schedule)
+
+    def _refresh_images(self):
+        """Worker thread: pick up new Drive files, then prefetch what the catalog needs."""
+        try:
+            self.price.image_loader.refresh()
+        except Exception as e:
+            # Prefetch still works from the last synced file map
+            logging.error(f"Failed to refresh Drive file map: {e}")
+        return self.prefetcher.schedule()
+
+    def _on_prefetch_progress(self, progress):
+        if progress["done"] < progress["total"]:
+            self.idle.set_sync_status(f"Caching images... ({progress['done']}/{progress['total']})")
+        else:
+            self.idle.set_sync_status(self.sync_status)
+
     # Button handlers
     def _on_red(self, ch):
         if self.mode == "PriceCheck" or self.mode == "Admin" or self.mode == "Cart":
@@ -98,22 +171,11 @@ class App:
     def init_google_services(self):
         """Initialize Google Drive and Sheets services."""
         try:
-            # Set up Google Drive API client with comprehensive scopes
-            scopes = [
-                'https://www.googleapis.com/auth/drive.readonly',
-                'https://www.googleapis.com/auth/spreadsheets',
-                'https://www.googleapis.com/auth/drive',
-            ]
+            # Borrow clients from the process-wide session
+            session = get_session()
             
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            
-            # Initialize Drive service
-            drive_service = build('drive', 'v3', credentials=creds)
-            self.drive_service = drive_service
-            
-            # Initialize Sheets service
-            sheets_service = build('sheets', 'v4', credentials=creds)
-            self.sheets_service = sheets_service
+            # Drive client of this (worker) thread, used only here
+            drive_service = session.drive()
             
             # Test Drive connection by listing files
             results = drive_service.files().list(pageSize=10, fields="nextPageToken, files(id, name)").execute()
@@ -128,15 +190,14 @@ class App:
             # Test Sheets connection by getting spreadsheet info
             try:
                 # Use gspread for easier sheet access
-                gc = gspread.authorize(creds)
-                sheet = gc.open(GS_SHEET_NAME)
+                sheet = session.spreadsheet()
                 worksheets = sheet.worksheets()
                 worksheet_names = [ws.title for ws in worksheets]
                 logging.info(f"Found worksheets in {GS_SHEET_NAME}: {', '.join(worksheet_names)}")
                 
                 # Check if Service tab exists
                 if "Service" in worksheet_names:
-                    service_tab = sheet.worksheet("Service")
+                    service_tab = session.worksheet("Service")
                     values = service_tab.get_all_values()
                     logging.info(f"Service tab contains {len(values)} rows")
                 else:
@@ -173,9 +234,7 @@ class App:
             logging.error(f"Failed to initialize Google services: {e}")
             import traceback
             logging.error(traceback.format_exc())
-            self.drive_service = None
-            self.sheets_service = None
-            return False
+            raise  # marks the boot stage failed
 
     # Mode switcher
     def set_mode(self, mode_name: str):
@@ -202,7 +261,20 @@ class App:
             self.cart.start()
 
     def run(self):
-        self.set_mode("Idle")
+        with profiler.stage("idle paint"):
+            self.set_mode("Idle")
+            self.root.update_idletasks()
+
+        paint_ms = (time.monotonic() - self.boot_started_ts) * 1000
+        if paint_ms > BOOT_PAINT_BUDGET_MS:
+            logging.warning(f"Boot: Idle painted in {paint_ms:.0f} ms (budget {BOOT_PAINT_BUDGET_MS} ms)")
+        else:
+            logging.info(f"Boot: Idle painted in {paint_ms:.0f} ms")
+        profiler.remove_import_hook()
+        profiler.report()
+
+        # Start network sync only once Idle is on screen
+        self.root.after(0, self.boot.start)
         self.root.mainloop()
         self.shutdown()
 
@@ -221,135 +293,31 @@ class App:
     def update_upc_catalog_and_tax_rate(self):
         """Update UPC catalog and tax rate from Google Sheet."""
         try:
-            # Connect to Google Sheet
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-                "https://www.googleapis.com/auth/drive.readonly",
-            ]
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            gc = gspread.authorize(creds)
-            
-            # Get tax rate from Credentials tab, cell B27
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_CRED_TAB)
-            tax_rate_str = sheet.acell('B27').value
-            
-            # Parse tax rate (remove % sign if present)
-            if tax_rate_str:
-                tax_rate_str = tax_rate_str.replace('%', '').strip()
-                try:
-                    tax_rate = float(tax_rate_str)
-                    
-                    # Save to Tax.json
-                    tax_path = CRED_DIR / "Tax.json"
-                    with open(tax_path, 'w') as f:
-                        json.dump({"rate": tax_rate}, f)
-                    logging.info(f"Updated Tax.json with rate: {tax_rate}% from spreadsheet")
-                except ValueError:
-                    logging.error(f"Invalid tax rate in spreadsheet: {tax_rate_str}")
-            else:
-                logging.warning("Tax rate not found in spreadsheet")
-            
-            # Get inventory data from Inv tab
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_TAB)
-            rows = sheet.get_all_values()
-            
-            if not rows:
-                logging.error("Sheet returned no rows")
-                return
-                
-            # Define output headers and source column indexes (0-based) for A,B,C,E,F,G,H,I,J,K,L
-            out_headers = [
-                "UPC", "Brand", "Name", "Size", "Calories", "Sugar", "Sodium",
-                "Price", "Tax %", "QTY", "Image"
-            ]
-            col_idxs = [0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11]
-            
-            # Map rows to records
-            records = []
-            for r in rows[1:]:  # Skip header row
-                if not r:  # Skip blanks
-                    continue
-                upc = (r[0] if len(r) > 0 else "").strip()
-                if not upc:
-                    continue
-                vals = [(r[i].strip() if len(r) > i else "") for i in col_idxs]
-                records.append(dict(zip(out_headers, vals)))
-            
-            # Write CSV
-            CRED_DIR.mkdir(parents=True, exist_ok=True)
-            catalog_path = CRED_DIR / "upc_catalog.csv"
-            with open(catalog_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=
-# main.py (continued)
-    def update_upc_catalog_and_tax_rate(self):
-        """Update UPC catalog and tax rate from Google Sheet."""
-        try:
-            # Connect to Google Sheet
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-                "https://www.googleapis.com/auth/drive.readonly",
-            ]
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            gc = gspread.authorize(creds)
+            session = get_session()
             
-            # Get tax rate from Credentials tab, cell B27
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_CRED_TAB)
-            tax_rate_str = sheet.acell('B27').value
+            # Refresh the cached Credentials settings once per boot; tax rate is cell B27
+            settings = get_settings_store().refresh()
+            tax_rate = settings.tax_rate
             
-            # Parse tax rate (remove % sign if present)
-            if tax_rate_str:
-                tax_rate_str = tax_rate_str.replace('%', '').strip()
-                try:
-                    tax_rate = float(tax_rate_str)
-                    
-                    # Save to Tax.json
-                    tax_path = CRED_DIR / "Tax.json"
-                    with open(tax_path, 'w') as f:
-                        json.dump({"rate": tax_rate}, f)
-                    logging.info(f"Updated Tax.json with rate: {tax_rate}% from spreadsheet")
-                except ValueError:
-                    logging.error(f"Invalid tax rate in spreadsheet: {tax_rate_str}")
-            else:
+            if tax_rate is not None:
+                # Save to Tax.json
+                tax_path = CRED_DIR / "Tax.json"
+                with open(tax_path, 'w') as f:
+                    json.dump({"rate": tax_rate}, f)
+                logging.info(f"Updated Tax.json with rate: {tax_rate}% from spreadsheet")
+            elif not settings.tax_rate_raw:
                 logging.warning("Tax rate not found in spreadsheet")
             
-            # Get inventory data from Inv tab
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_TAB)
-            rows = sheet.get_all_values()
-            
-            if not rows:
-                logging.error("Sheet returned no rows")
-                return
-                
-            # Define output headers and source column indexes (0-based) for A,B,C,E,F,G,H,I,J,K,L
-            out_headers = [
-                "UPC", "Brand", "Name", "Size", "Calories", "Sugar", "Sodium",
-                "Price", "Tax %", "QTY", "Image"
-            ]
-            col_idxs = [0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11]
-            
-            # Map rows to records
-            records = []
-            for r in rows[1:]:  # Skip header row
-                if not r:  # Skip blanks
-                    continue
-                upc = (r[0] if len(r) > 0 else "").strip()
-                if not upc:
-                    continue
-                vals = [(r[i].strip() if len(r) > i else "") for i in col_idxs]
-                records.append(dict(zip(out_headers, vals)))
-            
-            # Write CSV
-            CRED_DIR.mkdir(parents=True, exist_ok=True)
-            catalog_path = CRED_DIR / "upc_catalog.csv"
-            with open(catalog_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=out_headers)
-                writer.writeheader()
-                writer.writerows(records)
+            # Get inventory data from Inv tab (skipped if Drive says it is unchanged),
+            # write the local snapshot and swap the live index
+            count = self.catalog.refresh_from_sheet()
                 
-            logging.info(f"Downloaded UPC catalog with {len(records)} rows")
+            logging.info(f"UPC catalog ready with {count} rows")
+            session.log_stats()
             
         except Exception as e:
             logging.error(f"Failed to update UPC catalog and tax rate: {e}")
+            raise  # marks the boot stage failed
 
     def shutdown(self):
         try:
@@ -362,7 +330,15 @@ class App:
             elif self.mode == "Cart":
                 self.cart.stop()
         finally:
-            GPIO.cleanup()
+            self.catalog.unknown_scans.flush()
+            get_disk_cache().flush()
+            self.refresher.stop()
+            self.journal.close()
+            self.uploads.stop()
+            self.stock.stop()
+            self.prefetcher.stop()
+            self.worker.stop()
+            self.gpio.cleanup()
             try:
                 self.root.destroy()
             except:
@@ -0,0 +1,94 @@
+# models/cart.py
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from models.product import format_cents
+
+
+class CartLine:
+    """One cart row: a product and its quantity. position is the row index in the UI list."""
+
+    __slots__ = ("key", "name", "price_cents", "taxable", "image", "qty", "position")
+
+    def __init__(self, key, name, price_cents, taxable, image, position):
+        self.key = key
+        self.name = name
+        self.price_cents = price_cents
+        self.taxable = taxable
+        self.image = image
+        self.qty = 0
+        self.position = position
+
+    @property
+    def total_cents(self):
+        return self.price_cents * self.qty
+
+    def display_text(self):
+        return f"{self.qty} x {self.name} - {format_cents(self.price_cents)} = {format_cents(self.total_cents)}"
+
+
+class Cart:
+    """
+    Shopping cart with running integer-cent totals.
+    Lines are found by catalog key in O(1) and subtotal / taxable subtotal are
+    adjusted per change, so a scan costs the same however long the cart is.
+    Tax is charged on the taxable subtotal, rounded half-up to the cent.
+    """
+
+    def __init__(self, tax_rate=0.0):
+        self.tax_rate = Decimal(str(tax_rate))  # fraction, e.g. 0.0838
+        self.lines = {}  # key -> CartLine, in the order first added
+        self.subtotal_cents = 0
+        self.taxable_cents = 0
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __iter__(self):
+        return iter(self.lines.values())
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    def add(self, product, qty=1):
+        """Add qty of a Product; returns (line, is_new_line)."""
+        line = self.lines.get(product.key)
+        is_new = line is None
+        if is_new:
+            line = CartLine(product.key, product.display_name, product.price_cents,
+                            product.taxable, product.image, len(self.lines))
+            self.lines[product.key] = line
+        line.qty += qty
+        delta = line.price_cents * qty
+        self.subtotal_cents += delta
+        if line.taxable:
+            self.taxable_cents += delta
+        return line, is_new
+
+    def clear(self):
+        self.lines.clear()
+        self.subtotal_cents = 0
+        self.taxable_cents = 0
+
+    def set_tax_rate(self, tax_rate):
+        self.tax_rate = Decimal(str(tax_rate))
+
+    @property
+    def tax_cents(self):
+        return int((self.taxable_cents * self.tax_rate).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+    @property
+    def total_cents(self):
+        return self.subtotal_cents + self.tax_cents
+
+    def journal_record(self, payment_method, transaction_id=None):
+        """Compact sale record for the transaction journal (amounts in cents)."""
+        return {
+            "ts": round(time.time(), 3),
+            "id": transaction_id,
+            "pay": payment_method,
+            "items": [[line.key, line.qty, line.price_cents, int(line.taxable)] for line in self.lines.values()],
+            "sub": self.subtotal_cents,
+            "tax": self.tax_cents,
+            "tot": self.total_cents,
+        }
@@ -1,105 +1,223 @@
 # models/image_loader.py
+import hashlib
 import io
 import logging
-from pathlib import Path
+import threading
+import time
+from contextlib import contextmanager
 from PIL import Image
-import googleapiclient.http
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
+
+from utils.google_session import get_session
+from utils.disk_cache import get_disk_cache
+from utils.drive_file_map import DriveFileMap
+from utils.image_lru import ImageLRU
+
+STALE_RETRY_S = 300  # after a failed re-download, show the cached copy this long before retrying
 
 class GoogleDriveImageLoader:
     """Handles loading images from Google Drive folder with caching."""
 
-    def __init__(self, credentials_path, folder_id):
+    def __init__(self, credentials_path, folder_id, connect=True):
         self.folder_id = folder_id
-        self.cache_dir = Path.home() / "SelfCheck" / "ImageCache"
-        self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.file_map = {}  # filename -> file_id mapping
-        self.drive_service = None
-        self._init_drive_service(credentials_path)
+        self.credentials_path = credentials_path
+        self.disk = get_disk_cache()  # size-capped, sharded copies of downloaded images
+        # Persisted folder listing, usable offline; refresh() applies Drive changes to it
+        self.drive_files = DriveFileMap(folder_id)
+        self.file_info = {}  # filename -> (file_id, md5, modifiedTime)
+        self.file_map = {}   # filename -> file_id mapping
+        self._publish_file_map()
+        self.connected = False  # Drive reachable; clients come from get_session() per thread
+        self.fitted = ImageLRU()  # (filename, box) -> RGB image scaled to fit the box
+        # Set while no scan is waiting on a download; the prefetcher yields to scans
+        self.foreground_idle = threading.Event()
+        self.foreground_idle.set()
+        self._foreground = 0
+        self._foreground_lock = threading.Lock()
+        self._retry_at = {}  # filename -> monotonic time a failed re-download may be retried
+        # connect=False defers the Drive round trips to refresh(), e.g. during background boot
+        if connect:
+            self._init_drive_service(credentials_path)
+
+    def refresh(self):
+        """Connect to Drive (if needed) and sync the file map; raises if Drive can't be reached."""
+        # Drive client of the calling thread (refresh runs on the background worker)
+        self._sync_file_map()
+        logging.info("Found %d files in Google Drive folder", len(self.file_map))
+        return len(self.file_map)
 
     def _init_drive_service(self, credentials_path):
-        """Initialize Google Drive API service."""
+        """Check Drive is reachable by syncing the file map with this thread's client."""
         try:
-            scopes = [
-                "https://www.googleapis.com/auth/drive.readonly",
-            ]
-            creds = Credentials.from_service_account_file(str(credentials_path), scopes=scopes)
-            self.drive_service = build('drive', 'v3', credentials=creds)
-            self._build_file_map()
+            self._sync_file_map()
             logging.info("Google Drive service initialized successfully")
         except Exception as e:
             logging.error("Failed to initialize Google Drive service: %s", e)
-            self.drive_service = None
-
-    def _build_file_map(self):
-        """Build a mapping of filename to file_id for the specified folder."""
-        if not self.drive_service:
-            return
+            self.connected = False
 
-        try:
-            query = f"'{self.folder_id}' in parents and trashed=false"
-            results = self.drive_service.files().list(
-                q=query,
-                fields="files(id, name)"
-            ).execute()
-
-            files = results.get('files', [])
-            self.file_map = {file['name']: file['id'] for file in files}
-            logging.info("Found %d files in Google Drive folder", len(self.file_map))
+    def _sync_file_map(self):
+        """Update the filename -> file_id map (full paginated list once, then the Changes feed)."""
+        self.drive_files.sync(get_session().drive())
+        self._publish_file_map()
+        self.connected = True
 
-        except Exception as e:
-            logging.error("Failed to build file map from Google Drive: %s", e)
+    def _publish_file_map(self):
+        # Reference swaps: readers on other threads see the old or the new map
+        info = self.drive_files.by_name()
+        self.file_info = info
+        self.file_map = {name: entry[0] for name, entry in info.items()}
 
     def get_image(self, filename):
         """
         Get image from Google Drive, with local caching.
         Returns PIL Image object or None if not found.
         """
-        if not filename or not self.drive_service:
+        if not filename:
             return None
 
-        # Check local cache first
-        cache_path = self.cache_dir / filename
-        if cache_path.exists():
+        # Check local cache first (works before Drive is connected)
+        cache_path = self.disk.get(filename)
+        if cache_path is not None and self._refresh_due(filename):
+            # Replaced in Drive since it was cached: fetch the new version, else show the old one
+            image = self._download_image(filename)
+            if image is not None:
+                return image
+        if cache_path is not None:
             try:
-                return Image.open(cache_path)
+                image = Image.open(cache_path)
+                image.load()  # decode now; closes the file handle
+                return image
             except Exception as e:
                 logging.warning("Failed to load cached image %s: %s", filename, e)
-                # Remove corrupted cache file
-                try:
-                    cache_path.unlink()
-                except:
-                    pass
+                # Remove corrupted (or externally deleted) cache file
+                self.disk.discard(filename)
+
+        if not self.connected:
+            return None
 
         # Download from Google Drive
-        file_id = self.file_map.get(filename)
-        if not file_id:
+        if filename not in self.file_map:
             logging.warning("File not found in Google Drive: %s", filename)
             return None
+        return self._download_image(filename)
 
+    def _download_image(self, filename):
         try:
-            # Download file content
-            request = self.drive_service.files().get_media(fileId=file_id)
-            file_content = io.BytesIO()
-
-            downloader = googleapiclient.http.MediaIoBaseDownload(file_content, request)
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-
-            # Save to cache
-            file_content.seek(0)
-            with open(cache_path, 'wb') as f:
-                f.write(file_content.read())
+            with self._foreground_download():
+                data = self.download(filename)
 
             # Load as PIL Image
-            file_content.seek(0)
-            image = Image.open(file_content)
+            image = Image.open(io.BytesIO(data))
+            image.load()
             logging.info("Downloaded and cached image: %s", filename)
             return image
 
         except Exception as e:
             logging.error("Failed to download image %s from Google Drive: %s", filename, e)
+            self._retry_at[filename] = time.monotonic() + STALE_RETRY_S
+            return None
+
+    def _refresh_due(self, filename):
+        """True if a scan should re-download filename because Drive has a newer version."""
+        if not self.connected or time.monotonic() < self._retry_at.get(filename, 0):
+            return False
+        return self.is_stale(filename)
+
+    @contextmanager
+    def _foreground_download(self):
+        with self._foreground_lock:
+            self._foreground += 1
+            self.foreground_idle.clear()
+        try:
+            yield
+        finally:
+            with self._foreground_lock:
+                self._foreground -= 1
+                if not self._foreground:
+                    self.foreground_idle.set()
+
+    def download(self, filename, drive=None, chunksize=None, before_chunk=None):
+        """
+        Download filename from Drive into the disk cache and return its bytes.
+        drive is the calling thread's Drive client (default: fetched for this thread).
+        before_chunk(), if given, is called before each chunk of chunksize bytes
+        is requested (default: the whole file in one request).
+        """
+        file_id = self.file_map[filename]
+        # googleapiclient is imported on first download
+        import googleapiclient.http
+        request = (drive or get_session().drive()).files().get_media(fileId=file_id)
+        file_content = io.BytesIO()
+
+        downloader = googleapiclient.http.MediaIoBaseDownload(
+            file_content, request, chunksize=chunksize or googleapiclient.http.DEFAULT_CHUNK_SIZE)
+        done = False
+        while done is False:
+            if before_chunk:
+                before_chunk()
+            status, done = downloader.next_chunk()
+
+        data = file_content.getvalue()
+        self.disk.put(filename, data, tag=self._validator(filename))
+        self.fitted.discard(filename)
+        return data
+
+    def _validator(self, filename):
+        """Drive version of filename: its md5Checksum, or modifiedTime when Drive has no md5."""
+        info = self.file_info.get(filename)
+        if not info:
+            return None
+        _, md5, modified = info
+        return md5 or modified
+
+    def is_stale(self, filename):
+        """
+        True if the cached copy of filename differs from the version in the Drive file map.
+        Copies cached without a usable validator are checked once by hashing the local file.
+        """
+        validator = self._validator(filename)
+        if validator is None or filename not in self.disk:
+            return False
+        tag = self.disk.tag(filename)
+        if tag == validator:
+            return False
+        md5 = self.file_info[filename][1]
+        if md5:
+            try:
+                with open(self.disk.path_for(filename), "rb") as f:
+                    local = hashlib.md5(f.read()).hexdigest()
+                if local == md5:
+                    self.disk.retag(filename, validator)
+                    return False
+            except OSError:
+                pass
+        return True
+
+    def needs_download(self, filename):
+        """True if filename is in Drive and missing from the disk cache or changed since it was cached."""
+        if filename not in self.file_map:
+            return False
+        return filename not in self.disk or self.is_stale(filename)
+
+    def get_fitted(self, filename, box):
+        """
+        RGB image scaled (LANCZOS) to fit inside box=(width, height), or None.
+        Served from the in-memory LRU, so a repeat scan skips decode and resize.
+        """
+        if not filename:
+            return None
+        key = (filename, tuple(box))
+        image = self.fitted.get(key)
+        if image is not None and not self._refresh_due(filename):
+            return image
+        image = self.get_image(filename)
+        if image is None:
             return None
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        bw, bh = box
+        scale = min(bw / image.width, bh / image.height)
+        size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+        if size != image.size:
+            image = image.resize(size, Image.LANCZOS)
+        self.fitted.put(key, image)
+        return image
@@ -0,0 +1,117 @@
+# models/product.py
+
+# Inv tab columns (0-based) of a sheet-shaped catalog row: A,B,C,E,F,G,H,I,J,K,L
+COL_UPC, COL_BRAND, COL_NAME, COL_SIZE = 0, 1, 2, 4
+COL_CALORIES, COL_SUGAR, COL_SODIUM = 5, 6, 7
+COL_PRICE, COL_TAX, COL_QTY, COL_IMAGE = 8, 9, 10, 11
+
+_TAXABLE_WORDS = {"yes", "y", "true", "x", "taxable"}
+
+
+def parse_cents(text):
+    """'$1,234.5' -> 123450; None if the cell is not a price."""
+    s = (text or "").strip().replace("$", "").replace(",", "")
+    if not s:
+        return None
+    neg = s.startswith("-")
+    whole, _, frac = s.lstrip("+-").partition(".")
+    if not (whole or frac) or not (whole or "0").isdigit() or (frac and not frac.isdigit()):
+        return None
+    # Round half up on the third decimal without going through float
+    frac = (frac + "000")[:3]
+    cents = int(whole or "0") * 100 + int(frac[:2]) + (1 if int(frac[2]) >= 5 else 0)
+    return -cents if neg else cents
+
+
+def parse_taxable(text):
+    """Tax column: Yes/No style flags, or a percentage where anything above 0 is taxable."""
+    s = (text or "").strip().lower().rstrip("%")
+    if s in _TAXABLE_WORDS:
+        return True
+    try:
+        return float(s) > 0
+    except ValueError:
+        return False
+
+
+def parse_qty(text):
+    try:
+        return int(float((text or "").strip().replace(",", "")))
+    except ValueError:
+        return None
+
+
+def format_cents(cents):
+    """123450 -> '$1,234.50'."""
+    sign = "-" if cents < 0 else ""
+    return f"{sign}${abs(cents) // 100:,}.{abs(cents) % 100:02d}"
+
+
+class Product:
+    """
+    One catalog product, parsed once when the index is built.
+    Text fields are stripped, the price is integer cents and the tax flag is a bool,
+    so modes render and total a scan without touching the raw sheet row.
+    """
+
+    __slots__ = ("key", "upc", "brand", "name", "size", "calories", "sugar", "sodium",
+                 "price_text", "price_cents", "taxable", "qty", "image")
+
+    def __init__(self, key, upc, brand="", name="", size="", calories="", sugar="", sodium="",
+                 price_text="", price_cents=None, taxable=False, qty=None, image=""):
+        self.key = key
+        self.upc = upc
+        self.brand = brand
+        self.name = name
+        self.size = size
+        self.calories = calories
+        self.sugar = sugar
+        self.sodium = sodium
+        self.price_text = price_text
+        self.price_cents = price_cents
+        self.taxable = taxable
+        self.qty = qty
+        self.image = image
+
+    @classmethod
+    def from_row(cls, row, key=None):
+        """Build from a sheet-shaped A..L row (the CSV snapshot / Inv tab layout)."""
+        def col(idx):
+            return (row[idx] if len(row) > idx else "").strip()
+
+        price_text = col(COL_PRICE)
+        return cls(
+            key=key,
+            upc=col(COL_UPC),
+            brand=col(COL_BRAND),
+            name=col(COL_NAME),
+            size=col(COL_SIZE),
+            calories=col(COL_CALORIES),
+            sugar=col(COL_SUGAR),
+            sodium=col(COL_SODIUM),
+            price_text=price_text,
+            price_cents=parse_cents(price_text),
+            taxable=parse_taxable(col(COL_TAX)),
+            qty=parse_qty(col(COL_QTY)),
+            image=col(COL_IMAGE),
+        )
+
+    @property
+    def display_name(self):
+        return " ".join(p for p in (self.brand, self.name, self.size) if p)
+
+    @property
+    def price_display(self):
+        """Formatted price, or the raw cell when it isn't a number (e.g. 'Ask')."""
+        return format_cents(self.price_cents) if self.price_cents is not None else self.price_text
+
+    def with_qty(self, qty):
+        """Copy of this product with a different on-hand QTY."""
+        copy = Product(self.key, self.upc)
+        for name in self.__slots__:
+            setattr(copy, name, getattr(self, name))
+        copy.qty = qty
+        return copy
+
+    def __repr__(self):
+        return f"Product({self.key!r}, {self.display_name!r}, {self.price_display!r})"
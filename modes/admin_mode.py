@@ -1,27 +1,33 @@
 # modes/admin_mode.py
+import time
 import logging
 import tkinter as tk
 import subprocess
 import json
 from pathlib import Path
 from PIL import Image, ImageTk, ImageDraw
-import gspread
-from google.oauth2.service_account import Credentials
 
 from config import WINDOW_W, WINDOW_H, ADMIN_BG_PATH, ADMIN_TIMEOUT_MS
-from config import GS_CRED_PATH, GS_SHEET_NAME, GS_CRED_TAB, CRED_DIR
+from config import GS_TAB, CRED_DIR, GS_UNKNOWN_TAB, STORE_HOURS_PATH
 from modes.base_mode import BaseMode
 from components.admin_login import AdminLoginScreen
 from ui.fonts import load_ttf
+from utils.google_session import get_session
+from utils.catalog import get_catalog
+from utils.settings import get_settings_store
 
 class AdminMode(BaseMode):
     """
     Admin mode for updating credentials and settings.
     Displays Admin.png with text overlay for options.
     """
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, catalog=None, refresher=None):
         super().__init__(root)
         
+        # Shared catalog; refreshed here and swapped in for every mode
+        self.catalog = catalog or get_catalog()
+        self.refresher = refresher  # CatalogRefresher; refreshes off the Tk thread
+        
         self.base_bg = None
         self.update_in_progress = False
         self.last_activity_ts = 0
@@ -67,6 +73,10 @@ class AdminMode(BaseMode):
         elif 80 <= x <= 380 and 696 <= y <= 766:
             if hasattr(self, "on_exit"):
                 self.on_exit()
+
+        # Export unknown scans button
+        elif 80 <= x <= 780 and 796 <= y <= 866:
+            self.export_unknown_scans()
         
         # Back button (in status screens)
         elif 80 <= x <= 480 and 500 <= y <= 570:
@@ -166,7 +176,8 @@ class AdminMode(BaseMode):
             {"text": "Update Location Files", "y": 400, "color": (0,150,100)},
             {"text": "WiFi Settings", "y": 500, "color": (100,100,200)},
             {"text": "Load Inventory Portal", "y": 600, "color": (150,100,150)},
-            {"text": "Exit Admin Mode", "y": 700, "color": (200,60,60)}
+            {"text": "Exit Admin Mode", "y": 700, "color": (200,60,60)},
+            {"text": "Export Unknown Scans", "y": 800, "color": (200,130,0)}
         ]
         
         for btn in buttons:
@@ -216,40 +227,27 @@ class AdminMode(BaseMode):
         self._render_status("Updating credentials...")
 
         try:
-            # Connect to Google Sheet
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-                "https://www.googleapis.com/auth/drive.readonly",
-                "https://www.googleapis.com/auth/spreadsheets",
-            ]
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            gc = gspread.authorize(creds)
-
-            # Open sheet and get credentials tab
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_CRED_TAB)
+            # Explicit refresh: one batch_get of the whole Credentials column
+            settings = get_settings_store().refresh()
 
             # Create credentials directory if it doesn't exist
             CRED_DIR.mkdir(parents=True, exist_ok=True)
 
             # Update Cloudflared_Host from cell B18
-            cloudflared_host = sheet.acell('B18').value
             with open(CRED_DIR / "Cloudflared_Host", 'w') as f:
-                f.write(cloudflared_host or "")
+                f.write(settings.cloudflared_host)
 
             # Update GoogleFolderID.txt from cell B12
-            folder_id = sheet.acell('B12').value
             with open(CRED_DIR / "GoogleFolderID.txt", 'w') as f:
-                f.write(folder_id or "")
+                f.write(settings.folder_id)
 
             # Update MachineID.txt from cell B16
-            machine_id = sheet.acell('B16').value
             with open(CRED_DIR / "MachineID.txt", 'w') as f:
-                f.write(machine_id or "")
+                f.write(settings.machine_id)
 
             # Update GoogleCredEmail.txt from cell B10
-            cred_email = sheet.acell('B10').value
             with open(CRED_DIR / "GoogleCredEmail.txt", 'w') as f:
-                f.write(cred_email or "")
+                f.write(settings.cred_email)
 
             logging.info("Admin: Successfully updated credential files")
             self._render_status("Credentials updated successfully!")
@@ -270,42 +268,29 @@ class AdminMode(BaseMode):
         self._render_status("Updating location files...")
         
         try:
-            # Connect to Google Sheet
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-                "https://www.googleapis.com/auth/drive.readonly",
-                "https://www.googleapis.com/auth/spreadsheets",
-            ]
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            gc = gspread.authorize(creds)
-            
-            # Open sheet
-            sheet = gc.open(GS_SHEET_NAME)
+            # Open sheet from the shared session
+            sheet = get_session().spreadsheet()
             
-            # 1. Update weather zipcode
-            cred_tab = sheet.worksheet(GS_CRED_TAB)
-            zipcode = cred_tab.acell('B24').value
-            weather_api_key = cred_tab.acell('B25').value
+            # 1. Update weather zipcode (B24) and API key (B25)
+            settings = get_settings_store().refresh()
             
             # Save zipcode and API key
             with open(CRED_DIR / "WeatherZipcode.txt", 'w') as f:
-                f.write(zipcode or "")
+                f.write(settings.zipcode)
             with open(CRED_DIR / "WeatherAPIKey.txt", 'w') as f:
-                f.write(weather_api_key or "")
+                f.write(settings.weather_api_key)
                 
-            # 2. Download UPC catalog
-            try:
-                inv_tab = sheet.worksheet(GS_TAB)
-                rows = inv_tab.get_all_values()
-                
-                # Save as CSV
-                with open(CRED_DIR / "upc_catalog.csv", 'w', newline='') as f:
-                    import csv
-                    writer = csv.writer(f)
-                    writer.writerows(rows)
-                logging.info(f"Saved UPC catalog with {len(rows)} rows")
-            except Exception as e:
-                logging.error(f"Failed to download UPC catalog: {e}")
+            # 2. Download UPC catalog (only if the sheet changed) into the snapshot and live index
+            if self.refresher:
+                # Runs on the background worker; scanning keeps using the current index
+                self.refresher.refresh_now()
+                logging.info("Admin: UPC catalog refresh started in background")
+            else:
+                try:
+                    count = self.catalog.refresh_from_sheet()
+                    logging.info(f"Saved UPC catalog with {count} rows")
+                except Exception as e:
+                    logging.error(f"Failed to download UPC catalog: {e}")
                 
             # 3. Download schedule from Hours tab
             try:
@@ -313,7 +298,7 @@ class AdminMode(BaseMode):
                 hours_data = hours_tab.get_all_values()
                 
                 # Save as CSV
-                with open(CRED_DIR / "store_hours.csv", 'w', newline='') as f:
+                with open(STORE_HOURS_PATH, 'w', newline='') as f:
                     import csv
                     writer = csv.writer(f)
                     writer.writerows(hours_data)
@@ -330,6 +315,35 @@ class AdminMode(BaseMode):
         finally:
             self.update_in_progress = False
     
+    def export_unknown_scans(self):
+        """Upload the unknown-scan counts to the Unknown Scans tab so the sheet can be fixed."""
+        if self.update_in_progress:
+            return
+
+        self.update_in_progress = True
+        self._render_status("Exporting unknown scans...")
+
+        try:
+            log = self.catalog.unknown_scans
+            log.flush()
+            rows = log.rows()
+            sheet = get_session().spreadsheet()
+            try:
+                ws = sheet.worksheet(GS_UNKNOWN_TAB)
+            except Exception:
+                ws = sheet.add_worksheet(title=GS_UNKNOWN_TAB, rows=max(len(rows), 100), cols=len(rows[0]))
+            ws.clear()
+            ws.update("A1", rows)
+            logging.info(f"Admin: Exported {len(rows) - 1} unknown UPCs to {GS_UNKNOWN_TAB}")
+            self._render_status(f"Exported {len(rows) - 1} unknown UPCs\nto the {GS_UNKNOWN_TAB} tab")
+
+        except Exception as e:
+            logging.error(f"Admin: Failed to export unknown scans: {e}")
+            self._render_status(f"Error: {str(e)}", is_error=True)
+
+        finally:
+            self.update_in_progress = False
+
     def open_wifi_settings(self):
         """Open WiFi settings with virtual keyboard."""
         # Implementation omitted for brevity - would include WiFi network scanning and connection UI
@@ -344,18 +358,8 @@ class AdminMode(BaseMode):
         self._render_status("Loading inventory portal...")
         
         try:
-            # Connect to Google Sheet
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-                "https://www.googleapis.com/auth/drive.readonly",
-                "https://www.googleapis.com/auth/spreadsheets",
-            ]
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            gc = gspread.authorize(creds)
-            
-            # Get portal URL
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_CRED_TAB)
-            portal_url = sheet.acell('B21').value
+            # Get portal URL (B21) from the cached settings
+            portal_url = get_settings_store().get().portal_url
             
             if not portal_url:
                 self._render_status("Inventory portal URL not found", is_error=True)
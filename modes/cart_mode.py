@@ -6,25 +6,30 @@ import json
 import csv
 import os
 from pathlib import Path
-from datetime import datetime
 import time
 from PIL import Image, ImageTk
 
-from config import CRED_DIR, WINDOW_W, WINDOW_H
-from utils.helpers import center_window, load_image
-from utils.upc_helpers import lookup_upc, format_price
+from config import CRED_DIR, WINDOW_W, WINDOW_H, GS_SALES_TAB, GS_SCANS_TAB, GS_SERVICE_TAB, MACHINE_ID
+from models.cart import Cart
+from models.product import format_cents
+from utils.catalog import get_catalog
+from utils.helpers import center_window
+from utils.journal import get_journal
+from utils.txn_ids import get_txn_allocator
+from utils.upload_queue import get_upload_queue
 
 class CartMode:
     """Cart mode for self-checkout functionality."""
     
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, catalog=None, journal=None, uploads=None, stock=None):
         self.root = root
+        self.catalog = catalog or get_catalog()  # shared with PriceCheck; swapped on refresh
+        self.journal = journal or get_journal()  # append-only sales log
+        self.uploads = uploads or get_upload_queue()  # rows for Sheets, sent in the background
+        self.stock = stock  # StockWriteback: QTY decrements for the Inv tab (optional)
         self.frame = None
-        self.cart_items = []
-        self.total = 0.0
-        self.tax_total = 0.0
-        self.grand_total = 0.0
         self.tax_rate = self._load_tax_rate()
+        self.cart = Cart(self.tax_rate)  # running integer-cent totals, key -> line
         
         # Callbacks
         self.on_exit = None
@@ -40,6 +45,10 @@ class CartMode:
         self.grand_total_label = None
         self.scan_label = None
         self.payment_frame = None
+        self.manual_entry_frame = None
+        self.manual_var = None
+        self.manual_listbox = None
+        self.manual_results = []  # Products shown in the manual entry list
         
         # Bind barcode scanner input
         self.root.bind("<Key>", self._on_key_press)
@@ -134,6 +143,10 @@ class CartMode:
                                bg="#27ae60", fg="white", command=self._toggle_scanning)
         scan_button.pack(pady=10)
         
+        manual_button = tk.Button(scan_content, text="Manual Entry", font=("Arial", 14),
+                                 bg="#3498db", fg="white", command=self._show_manual_entry)
+        manual_button.pack(pady=(0, 10))
+        
         # Totals section
         totals_frame = tk.Frame(right_frame, bg="white", bd=1, relief=tk.SOLID)
         totals_frame.pack(fill=tk.X, pady=(0, 20))
@@ -239,13 +252,11 @@ class CartMode:
             self.frame.place(x=0, y=0, width=WINDOW_W, height=WINDOW_H)
         
         # Reset cart
-        self.cart_items = []
-        self.total = 0.0
-        self.tax_total = 0.0
-        self.grand_total = 0.0
+        self.cart.clear()
+        self.cart.set_tax_rate(self.tax_rate)
         
         # Update UI
-        self._update_cart_display()
+        self.cart_listbox.delete(0, tk.END)
         self._update_totals()
         self._update_payment_availability()
         
@@ -255,9 +266,12 @@ class CartMode:
         
         # Reset payment state
         self.payment_in_progress = False
+        
+        self._log_service("Cart started")
     
     def stop(self):
         """Stop cart mode."""
+        self._hide_manual_entry()
         if self.frame:
             self.frame.place_forget()
         
@@ -291,70 +305,126 @@ class CartMode:
         logging.info(f"Processing barcode: {barcode}")
         self.scan_label.config(text=f"Scanning: {barcode}")
         
-        # Look up the UPC
-        product = lookup_upc(barcode)
+        # Look up the UPC in the shared catalog
+        key, product = self.catalog.lookup(barcode)
+        self.uploads.enqueue(GS_SCANS_TAB, [time.strftime("%Y-%m-%d %H:%M:%S"), barcode, key,
+                                            "found" if product else "unknown"])
         
-        if product:
+        if product and product.price_cents is None:
+            logging.error(f"Cart: no usable price for {key}: {product.price_text!r}")
+            self.scan_label.config(text=f"Price unavailable: {barcode}")
+        elif product:
             # Add to cart
             self._add_to_cart(product)
-            self.scan_label.config(text=f"Added: {product['Name']}")
+            self.scan_label.config(text=f"Added: {product.display_name}")
         else:
             self.scan_label.config(text=f"Product not found: {barcode}")
             # Reset after a delay
             self.root.after(2000, lambda: self.scan_label.config(text="Ready to scan"))
     
     def _add_to_cart(self, product):
-        """Add a product to the cart."""
-        # Check if product is already in cart
-        for item in self.cart_items:
-            if item['UPC'] == product['UPC']:
-                item['quantity'] += 1
-                self._update_cart_display()
-                self._update_totals()
-                return
-        
-        # Add new product to cart
-        cart_item = product.copy()
-        cart_item['quantity'] = 1
-        self.cart_items.append(cart_item)
+        """Add a product to the cart; only its own listbox row and the totals are redrawn."""
+        line, is_new = self.cart.add(product)
         
         # Update display
-        self._update_cart_display()
+        self._update_cart_line(line, is_new)
         self._update_totals()
-        self._update_payment_availability()
+        if is_new and len(self.cart) == 1:
+            self._update_payment_availability()
     
-    def _update_cart_display(self):
-        """Update the cart listbox display."""
-        self.cart_listbox.delete(0, tk.END)
-        
-        for item in self.cart_items:
-            name = item.get('Name', 'Unknown')
-            price = float(item.get('Price', 0))
-            quantity = item.get('quantity', 1)
-            total = price * quantity
-            
-            display_text = f"{quantity} x {name} - {format_price(price)} = {format_price(total)}"
-            self.cart_listbox.insert(tk.END, display_text)
+    # ---- Manual entry (type-ahead search for items without a barcode) ----
+    MANUAL_KEYS = [
+        ['1', '2', '3', '4', '5', '6', '7', '8', '9', '0'],
+        ['q', 'w', 'e', 'r', 't', 'y', 'u', 'i', 'o', 'p'],
+        ['a', 's', 'd', 'f', 'g', 'h', 'j', 'k', 'l'],
+        ['z', 'x', 'c', 'v', 'b', 'n', 'm'],
+    ]
+    
+    def _show_manual_entry(self):
+        """Open the on-screen keyboard with live product matches."""
+        if self.payment_in_progress:
+            return
+        if self.manual_entry_frame:
+            self.manual_entry_frame.destroy()
+        
+        frame = tk.Frame(self.frame, bg="#2c3e50")
+        frame.place(x=140, y=80, width=WINDOW_W - 280, height=WINDOW_H - 160)
+        self.manual_entry_frame = frame
+        
+        self.manual_var = tk.StringVar()
+        entry = tk.Entry(frame, textvariable=self.manual_var, font=("Arial", 26))
+        entry.pack(fill=tk.X, padx=20, pady=(20, 10))
+        
+        self.manual_listbox = tk.Listbox(frame, font=("Arial", 22), height=6, activestyle="none")
+        self.manual_listbox.pack(fill=tk.X, padx=20)
+        self.manual_listbox.bind("<<ListboxSelect>>", self._select_manual_result)
+        self.manual_results = []
+        
+        keyboard = tk.Frame(frame, bg="#2c3e50")
+        keyboard.pack(side=tk.BOTTOM, pady=20)
+        for row_keys in self.MANUAL_KEYS:
+            row_frame = tk.Frame(keyboard, bg="#2c3e50")
+            row_frame.pack(pady=4)
+            for key in row_keys:
+                tk.Button(row_frame, text=key.upper(), font=("Arial", 20), width=3,
+                          bg="#7f8c8d", fg="white",
+                          command=lambda k=key: self._manual_key(k)).pack(side=tk.LEFT, padx=3)
+        special = tk.Frame(keyboard, bg="#2c3e50")
+        special.pack(pady=4)
+        tk.Button(special, text="Space", font=("Arial", 20), width=12, bg="#7f8c8d", fg="white",
+                  command=lambda: self._manual_key(" ")).pack(side=tk.LEFT, padx=3)
+        tk.Button(special, text="←", font=("Arial", 20), width=4, bg="#e67e22", fg="white",
+                  command=lambda: self._manual_key(None)).pack(side=tk.LEFT, padx=3)
+        tk.Button(special, text="Close", font=("Arial", 20), width=6, bg="#e74c3c", fg="white",
+                  command=self._hide_manual_entry).pack(side=tk.LEFT, padx=3)
+    
+    def _manual_key(self, key):
+        """Apply one on-screen key press (None = backspace) and refresh the matches."""
+        text = self.manual_var.get()
+        text = text[:-1] if key is None else text + key
+        self.manual_var.set(text)
+        
+        # Type-ahead index lookup; a few ms even for large catalogs
+        self.manual_results = self.catalog.typeahead(text, limit=6) if text.strip() else []
+        self.manual_listbox.delete(0, tk.END)
+        for product in self.manual_results:
+            self.manual_listbox.insert(tk.END, f"{product.display_name}   {product.price_display}")
+    
+    def _select_manual_result(self, event=None):
+        selection = self.manual_listbox.curselection()
+        if not selection:
+            return
+        product = self.manual_results[selection[0]]
+        logging.info(f"Cart: Manual entry selected {product.key} ({product.display_name})")
+        self._hide_manual_entry()
+        if product.price_cents is None:
+            logging.error(f"Cart: no usable price for {product.key}: {product.price_text!r}")
+            self.scan_label.config(text=f"Price unavailable: {product.display_name}")
+        else:
+            self._add_to_cart(product)
+            self.scan_label.config(text=f"Added: {product.display_name}")
+    
+    def _hide_manual_entry(self):
+        if self.manual_entry_frame:
+            self.manual_entry_frame.destroy()
+            self.manual_entry_frame = None
+        self.manual_results = []
+    
+    def _update_cart_line(self, line, is_new):
+        """Insert a new listbox row, or replace just the row of an existing line."""
+        if not is_new:
+            self.cart_listbox.delete(line.position)
+        self.cart_listbox.insert(line.position, line.display_text())
     
     def _update_totals(self):
-        """Update the total, tax, and grand total displays."""
-        # Calculate subtotal
-        self.total = sum(float(item.get('Price', 0)) * item.get('quantity', 1) for item in self.cart_items)
-        
-        # Calculate tax
-        self.tax_total = self.total * self.tax_rate
-        
-        # Calculate grand total
-        self.grand_total = self.total + self.tax_total
-        
-        # Update labels
-        self.total_label.config(text=format_price(self.total))
-        self.tax_label.config(text=format_price(self.tax_total))
-        self.grand_total_label.config(text=format_price(self.grand_total))
+        """Update the total, tax, and grand total displays from the running totals."""
+        self.total_label.config(text=format_cents(self.cart.subtotal_cents))
+        self.tax_label.config(text=format_cents(self.cart.tax_cents))
+        self.grand_total_label.config(text=format_cents(self.cart.total_cents))
     
     def _update_payment_availability(self):
         """Enable or disable payment based on cart contents."""
-        if self.cart_items:
+        if self.cart:
             for widget in self.payment_frame.winfo_children():
                 if isinstance(widget, tk.Frame):  # This is the header or content frame
                     for subwidget in widget.winfo_children():
@@ -378,7 +448,7 @@ class CartMode:
     
     def _process_payment(self, payment_method):
         """Process payment."""
-        if not self.cart_items or self.payment_in_progress:
+        if not self.cart or self.payment_in_progress:
             return
         
         self.payment_in_progress = True
@@ -425,29 +495,37 @@ class CartMode:
     
     def _print_receipt(self, payment_method, payment_window):
         """Print receipt and close payment window."""
-        # Generate receipt
-        receipt_data = {
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "items": self.cart_items,
-            "subtotal": self.total,
-            "tax": self.tax_total,
-            "total": self.grand_total,
-            "payment_method": payment_method
-        }
-        
-        # Save receipt to file
         try:
-            receipts_dir = CRED_DIR / "receipts"
-            receipts_dir.mkdir(exist_ok=True)
-            
-            receipt_file = receipts_dir / f"receipt_{int(time.time())}.json"
-            with open(receipt_file, 'w') as f:
-                json.dump(receipt_data, f, indent=2)
-            
-            logging.info(f"Receipt saved to {receipt_file}")
+            transaction_id = get_txn_allocator().next_id()
+        except Exception as e:
+            logging.error(f"Error allocating transaction ID: {e}")
+            transaction_id = f"T{int(time.time())}"
+
+        # Record the sale in the journal first, on disk before the receipt is confirmed
+        record = None
+        try:
+            record = self.cart.journal_record(payment_method, transaction_id)
+            self.journal.append(record, sync=True)
+            logging.info(f"Sale {record['id']} journaled: {len(self.cart)} lines, total {format_cents(record['tot'])}")
         except Exception as e:
             logging.error(f"Error saving receipt: {e}")
-        
+
+        # Best-effort side effects; each failure is logged without blocking the others
+        if self.stock:
+            try:
+                self.stock.record_sale([(line.key, line.qty) for line in self.cart])
+            except Exception as e:
+                logging.error(f"Error recording stock for sale {transaction_id}: {e}")
+        if record:
+            try:
+                self.uploads.enqueue(GS_SALES_TAB, [
+                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["ts"])), record["id"],
+                    payment_method, sum(line.qty for line in self.cart), format_cents(record["sub"]),
+                    format_cents(record["tax"]), format_cents(record["tot"])])
+            except Exception as e:
+                logging.error(f"Error queueing sale {transaction_id} for upload: {e}")
+        self._log_service("Sale completed", transaction_id)
+
         # Close payment window
         payment_window.destroy()
         
@@ -455,6 +533,11 @@ class CartMode:
         if self.on_exit:
             self.on_exit()
     
+    def _log_service(self, event, detail=""):
+        """Queue a row for the Service tab; uploaded in the background."""
+        self.uploads.enqueue(GS_SERVICE_TAB, [time.strftime("%Y-%m-%d %H:%M:%S"), MACHINE_ID,
+                                              event, detail])
+    
     def _exit(self):
         """Exit cart mode."""
         if self.on_exit:
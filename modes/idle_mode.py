@@ -3,25 +3,25 @@ import random
 import time
 import logging
 import tkinter as tk
-import requests
 import json
 from datetime import datetime
 from pathlib import Path
 from PIL import Image, ImageTk, ImageDraw
-import gspread
-from google.oauth2.service_account import Credentials
 
 from config import WINDOW_W, WINDOW_H, IDLE_DIR, IMAGE_EXTS, SLIDE_MS, WEATHER_UPDATE_INTERVAL
-from config import GS_CRED_PATH, GS_SHEET_NAME, GS_CRED_TAB
 from modes.base_mode import BaseMode
 from ui.fonts import load_ttf
+from utils.settings import get_settings
 
 class IdleMode(BaseMode):
     """Fullscreen slideshow with weather, time, and hidden admin button."""
     
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, worker=None):
         super().__init__(root)
         
+        # Background worker (optional) for the weather sheet/API calls
+        self.worker = worker
+        
         # Bottom text
         self.bottom_text = tk.Label(root, text="Tap Anywhere to Start", 
                                    font=("Arial", 36, "bold"), fg="white", bg="black")
@@ -32,6 +32,10 @@ class IdleMode(BaseMode):
         # Weather display
         self.weather_label = tk.Label(root, text="", font=("Arial", 24), fg="white", bg="black")
         
+        # Background sync status (bottom-left, hidden when empty)
+        self.sync_status = ""
+        self.status_label = tk.Label(root, text="", font=("Arial", 14), fg="gray", bg="black")
+        
         # Hidden admin button (invisible but clickable)
         self.admin_button = tk.Label(root, text="", bg="black")
         
@@ -153,11 +157,11 @@ class IdleMode(BaseMode):
         self.label.place(x=0, y=0, width=WINDOW_W, height=WINDOW_H)
         self.label.lift()
         
-        # Load zipcode and API key from credentials
-        self._load_weather_config()
-        
-        # Update weather data
-        self._update_weather()
+        # Load zipcode/API key and update weather data off the Tk thread if possible
+        if self.worker:
+            self.worker.submit(self._refresh_weather)
+        else:
+            self._refresh_weather()
         
         self.order = self._load_images()
         logging.info("Idle: found %d image(s) in %s", len(self.order), IDLE_DIR)
@@ -192,7 +196,8 @@ class IdleMode(BaseMode):
     def _hide_all_overlays(self):
         """Hide all overlay elements and main label"""
         # Explicitly hide all overlays to ensure they're removed
-        for widget in [self.bottom_text, self.time_label, self.weather_label, self.admin_button]:
+        for widget in [self.bottom_text, self.time_label, self.weather_label, self.admin_button,
+                       self.status_label]:
             widget.place_forget()
         
         self.label.place_forget()
@@ -209,6 +214,7 @@ class IdleMode(BaseMode):
         self.time_label.place_forget()
         self.weather_label.place_forget()
         self.admin_button.place_forget()
+        self.status_label.place_forget()
         
         # Load default background
         default_bg_path = Path.home() / "SelfCheck" / "SysPics" / "Default.png"
@@ -274,24 +280,29 @@ class IdleMode(BaseMode):
             self._update_overlays()
 
     def _load_weather_config(self):
-        """Load zipcode and API key from Google Sheet."""
+        """Load zipcode and API key from the cached Credentials settings."""
         try:
-            scopes = [
-                "https://www.googleapis.com/auth/spreadsheets.readonly",
-                "https://www.googleapis.com/auth/drive.readonly",
-                "https://www.googleapis.com/auth/spreadsheets",
-            ]
-            creds = Credentials.from_service_account_file(str(GS_CRED_PATH), scopes=scopes)
-            gc = gspread.authorize(creds)
-            sheet = gc.open(GS_SHEET_NAME).worksheet(GS_CRED_TAB)
-            self.zipcode = sheet.acell('B24').value
-            self.weather_api_key = sheet.acell('B25').value
+            settings = get_settings()
+            self.zipcode = settings.zipcode or None
+            self.weather_api_key = settings.weather_api_key or None
             logging.info(f"Loaded zipcode: {self.zipcode}, API key available: {bool(self.weather_api_key)}")
         except Exception as e:
             logging.error(f"Failed to load weather config: {e}")
             self.zipcode = None
             self.weather_api_key = None
 
+    def _refresh_weather(self):
+        """Load weather config and update weather data (may run on the background worker)."""
+        self._load_weather_config()
+        self._update_weather()
+
+    def set_sync_status(self, text):
+        """Show background sync progress in the corner; empty text hides it."""
+        self.sync_status = text or ""
+        self.status_label.config(text=self.sync_status)
+        if not self.sync_status:
+            self.status_label.place_forget()
+
     def _update_weather(self):
         """Update weather data if needed."""
         current_time = time.time()
@@ -302,6 +313,7 @@ class IdleMode(BaseMode):
             return
             
         try:
+            import requests
             url = f"https://api.openweathermap.org/data/2.5/weather?zip={self.zipcode},us&units=imperial&appid={self.weather_api_key}"
             response = requests.get(url, timeout=5)
             if response.status_code == 200:
@@ -404,6 +416,10 @@ class IdleMode(BaseMode):
             except Exception as e:
                 logging.error(f"Error displaying weather: {e}")
         
+        # Background sync progress
+        if self.sync_status:
+            self.status_label.place(x=10, y=WINDOW_H-10, anchor="sw")
+        
         # Position hidden admin button in top-left corner
         # Reduced to 25% of original size (from 100x100 to 25x25)
         self.admin_button.place(x=0, y=0, width=25, height=25)
@@ -425,5 +441,7 @@ class IdleMode(BaseMode):
                 self.time_label.lift()
             if self.weather_label.winfo_ismapped():
                 self.weather_label.lift()
+            if self.status_label.winfo_ismapped():
+                self.status_label.lift()
             if self.admin_button.winfo_ismapped():
                 self.admin_button.lift()
@@ -8,8 +8,7 @@ from config import WINDOW_W, WINDOW_H, PRICE_BG_PATH, PC_BLUE_BOX, PC_GREEN_BOX
 from config import PRICECHECK_TIMEOUT_MS, GS_CRED_PATH, GDRIVE_FOLDER_ID
 from modes.base_mode import BaseMode
 from models.image_loader import GoogleDriveImageLoader
-from utils.google_services import load_inventory_by_upc
-from utils.upc_helpers import upc_variants_from_scan
+from utils.catalog import get_catalog
 from ui.fonts import PC_FONT_TITLE, PC_FONT_SUB, PC_FONT_INFO, PC_FONT_LINE, PC_FONT_SMALL
 
 class PriceCheckMode(BaseMode):
@@ -19,27 +18,24 @@ class PriceCheckMode(BaseMode):
     Looks up UPC in Google Sheet 'Inventory1001'/'Inv'.
     Overlays text in the blue box and product image (from Column L) in the green box.
     """
-    # Column indices (0-based) for A..L:
-    IDX_B = 1
-    IDX_C = 2
-    IDX_E = 4
-    IDX_F = 5
-    IDX_G = 6
-    IDX_H = 7
-    IDX_I = 8
-    IDX_K = 10
-    IDX_L = 11
-
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, catalog=None, worker=None, boot=None):
         super().__init__(root)
         
         self.base_bg = None
-        self.inv = {}
+        self.inv_loading = False
         self.last_activity_ts = time.time()
         self.timeout_after = None
 
-        # Initialize Google Drive image loader
-        self.image_loader = GoogleDriveImageLoader(GS_CRED_PATH, GDRIVE_FOLDER_ID)
+        # Background worker / boot pipeline (optional) so the sheet is never read on the Tk thread
+        self.worker = worker
+        self.boot = boot
+
+        # Shared offline-first catalog; served from the last local snapshot until a refresh swaps it
+        self.catalog = catalog or get_catalog()
+
+        # Google Drive image loader; the file map is built later by the boot pipeline
+        self.image_loader = GoogleDriveImageLoader(GS_CRED_PATH, GDRIVE_FOLDER_ID,
+                                                   connect=worker is None)
 
         # Hidden entry to capture scanner input - create once and reuse
         self.scan_var = tk.StringVar()
@@ -83,19 +79,51 @@ class PriceCheckMode(BaseMode):
         
         self.base_bg = self._load_bg()
         self._render_base()
+
+        # Only reload inventory if we don't have it already
+        if not self.inv:
+            self._request_inventory()
+
+        self._reset_for_next_scan()
+        self._arm_timeout()
+
+    # ---- Inventory loading ----
+    @property
+    def inv(self):
+        """Current UPC index; replaced wholesale by the catalog on refresh."""
+        return self.catalog.index
+
+    def _request_inventory(self):
+        """Refresh the catalog from the sheet without blocking the Tk thread when possible."""
+        if self.inv_loading:
+            return
+        if self.boot and not self.boot.is_settled("catalog"):
+            # Boot pipeline is still syncing; the catalog is swapped in when it completes
+            self.inv_loading = True
+            self.boot.when_settled("catalog", self._on_inventory_settled)
+            return
+        if self.worker:
+            self.inv_loading = True
+            self.worker.submit(self.catalog.refresh_from_sheet, on_done=self._on_inventory_settled,
+                               on_error=self._on_inventory_error)
+            return
         try:
-            # Only reload inventory if we don't have it already
-            if not self.inv:
-                self.inv = load_inventory_by_upc()
+            self.catalog.refresh_from_sheet()
         except Exception as e:
-            self.inv = {}
             self._overlay_notice(f"Sheet error:\n{e}")
 
-        self._reset_for_next_scan()
-        self._arm_timeout()
+    def _on_inventory_settled(self, *_):
+        self.inv_loading = False
+        logging.info("PriceCheck: catalog ready with %d keys", len(self.inv))
+
+    def _on_inventory_error(self, e):
+        self.inv_loading = False
+        if self.is_active:
+            self._overlay_notice(f"Sheet error:\n{e}")
 
     def stop(self):
         logging.info("PriceCheck: Stopping mode")
+        logging.info("PriceCheck: image LRU %s", self.image_loader.fitted.metrics())
         if self.timeout_after:
             self.root.after_cancel(self.timeout_after)
             self.timeout_after = None
@@ -144,7 +172,7 @@ class PriceCheckMode(BaseMode):
         self.label.configure(image=self.tk_img)
         self.label.lift()
 
-    def _overlay_result(self, row_list):
+    def _overlay_result(self, product):
         frame = self.base_bg.copy()
         d = ImageDraw.Draw(frame)
         bx1,by1,bx2,by2 = PC_BLUE_BOX
@@ -154,19 +182,16 @@ class PriceCheckMode(BaseMode):
         gy1 -= 72  # Move up by ~1 inch
         gy2 -= 72  # Move up by ~1 inch
 
-        def col(idx):
-            return (row_list[idx] if len(row_list) > idx else "").strip()
-
-        # Texts from columns
-        title = col(self.IDX_B)
-        sub   = col(self.IDX_C)
-        size  = col(self.IDX_E)
-        cal   = col(self.IDX_F)
-        sug   = col(self.IDX_G)
-        sod   = col(self.IDX_H)
-        lineI = col(self.IDX_I)
-        onhand= col(self.IDX_K)
-        picnm = col(self.IDX_L)
+        # Texts from the pre-parsed product (columns B,C,E,F,G,H,I,K,L)
+        title = product.brand
+        sub   = product.name
+        size  = product.size
+        cal   = product.calories
+        sug   = product.sugar
+        sod   = product.sodium
+        lineI = product.price_text
+        onhand= product.qty if product.qty is not None else ""
+        picnm = product.image
 
         # Blue area content (no border)
         d.text((bx1+12, by1+10), title, font=PC_FONT_TITLE, fill=(0,0,0))
@@ -182,14 +207,11 @@ class PriceCheckMode(BaseMode):
         # Product image into green box from Google Drive (moved up 1 inch)
         if picnm:
             try:
-                pim = self.image_loader.get_image(picnm)
+                gw, gh = gx2-gx1, gy2-gy1
+                # Decoded and scaled once per (image, box); repeat scans come from memory
+                pim = self.image_loader.get_fitted(picnm, (gw, gh))
                 if pim:
-                    if pim.mode in ("RGBA","P"):
-                        pim = pim.convert("RGB")
-                    gw, gh = gx2-gx1, gy2-gy1
-                    scale = min(gw/pim.width, gh/pim.height)
-                    nw, nh = max(1,int(pim.width*scale)), max(1,int(pim.height*scale))
-                    pim = pim.resize((nw, nh), Image.LANCZOS)
+                    nw, nh = pim.size
                     ox = gx1 + (gw - nw)//2
                     oy = gy1 + (gh - nh)//2
                     frame.paste(pim, (ox, oy))
@@ -222,21 +244,22 @@ class PriceCheckMode(BaseMode):
             self._overlay_notice("No scan")
             return
 
-        tried = upc_variants_from_scan(upc)
-        logging.info("Scan received: %r -> trying variants: %s", upc, tried)
+        if not self.inv:
+            if self.inv_loading:
+                self._overlay_notice("Catalog is still loading.\nPlease try again shortly.")
+            else:
+                self._overlay_notice("Catalog unavailable.\nPlease try again shortly.")
+                self._request_inventory()
+            return
 
-        row = None
-        for v in tried:
-            row = self.inv.get(v)
-            if row:
-                logging.info("Match on variant: %r", v)
-                break
+        key, product = self.catalog.lookup(upc)
+        logging.info("Scan received: %r -> key %r (%s)", upc, key, "match" if product else "no match")
 
-        if not row:
+        if not product:
             self._overlay_notice(f"Not found:\n{upc}")
             return
 
-        self._overlay_result(row)
+        self._overlay_result(product)
 
     def _reset_for_next_scan(self):
         logging.info("PriceCheck: Resetting for next scan")
@@ -0,0 +1,77 @@
+# utils/background.py
+import logging
+import queue
+import threading
+
+
+class BackgroundWorker:
+    """
+    Runs jobs on a single daemon thread, off the Tk main loop.
+    Results and callbacks are queued back and executed on the Tk thread,
+    since Tk widgets must never be touched from another thread.
+    """
+
+    def __init__(self, root, name="background", poll_ms=100):
+        self.root = root
+        self.name = name
+        self.poll_ms = poll_ms
+        self._jobs = queue.Queue()
+        self._ui_calls = queue.Queue()
+        self._thread = None
+        self._poll_after = None
+        self._stopped = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        if self._poll_after is None:
+            self._poll_after = self.root.after(self.poll_ms, self._poll)
+
+    def stop(self):
+        self._stopped = True
+        self._jobs.put(None)
+        if self._poll_after:
+            try:
+                self.root.after_cancel(self._poll_after)
+            except Exception:
+                pass
+            self._poll_after = None
+
+    def submit(self, fn, on_done=None, on_error=None):
+        """Queue fn() for the worker; on_done(result) / on_error(exc) run on the Tk thread."""
+        self.start()
+        self._jobs.put((fn, on_done, on_error))
+
+    def post(self, fn, *args):
+        """Schedule fn(*args) on the Tk thread; safe to call from the worker."""
+        self._ui_calls.put((fn, args))
+
+    def _run(self):
+        while not self._stopped:
+            job = self._jobs.get()
+            if job is None:
+                break
+            fn, on_done, on_error = job
+            try:
+                result = fn()
+            except Exception as e:
+                logging.error("%s: job %s failed: %s", self.name, getattr(fn, "__name__", fn), e)
+                if on_error:
+                    self.post(on_error, e)
+                continue
+            if on_done:
+                self.post(on_done, result)
+
+    def _poll(self):
+        while True:
+            try:
+                fn, args = self._ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                logging.error("%s: UI callback failed: %s", self.name, e)
+        if not self._stopped:
+            self._poll_after = self.root.after(self.poll_ms, self._poll)
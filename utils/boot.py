@@ -0,0 +1,83 @@
+# utils/boot.py
+import logging
+import time
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class BootPipeline:
+    """
+    Ordered network sync stages run on a BackgroundWorker after Idle is painted.
+    Each stage reports progress back to the Tk thread, and an optional on_done
+    callback hands the stage result to the mode that needs it.
+    """
+
+    def __init__(self, worker):
+        self.worker = worker
+        self.stages = []  # [(name, fn, on_done)]
+        self.status = {}  # name -> PENDING/RUNNING/DONE/FAILED
+        self.durations = {}  # name -> seconds
+        self.on_progress = None  # callback(name, state, index, total) on Tk thread
+        self.on_finished = None  # callback(status dict) on Tk thread
+        self._waiters = {}  # name -> [callbacks]
+
+    def add_stage(self, name, fn, on_done=None):
+        self.stages.append((name, fn, on_done))
+        self.status[name] = PENDING
+
+    def start(self):
+        logging.info("Boot: starting %d background stage(s)", len(self.stages))
+        self.worker.submit(self._run_all)
+
+    def is_done(self, name):
+        return self.status.get(name) == DONE
+
+    def is_settled(self, name):
+        """True once the stage has either finished or failed."""
+        return self.status.get(name) in (DONE, FAILED)
+
+    def when_settled(self, name, callback):
+        """Run callback() on the Tk thread once the stage finishes or fails."""
+        if self.is_settled(name):
+            callback()
+        else:
+            self._waiters.setdefault(name, []).append(callback)
+
+    def _run_all(self):
+        total = len(self.stages)
+        for i, (name, fn, on_done) in enumerate(self.stages):
+            self.status[name] = RUNNING
+            self.worker.post(self._report, name, RUNNING, i, total)
+            t0 = time.monotonic()
+            try:
+                result = fn()
+            except Exception as e:
+                logging.error("Boot: stage %s failed: %s", name, e)
+                result = None
+                state = FAILED
+            else:
+                state = DONE
+            self.durations[name] = time.monotonic() - t0
+            logging.info("Boot: stage %s %s in %.2fs", name, state, self.durations[name])
+            if state == DONE and on_done:
+                self.worker.post(on_done, result)
+            self.worker.post(self._settle, name, state, i + 1, total)
+        self.worker.post(self._finish)
+
+    def _settle(self, name, state, index, total):
+        self.status[name] = state
+        self._report(name, state, index, total)
+        for callback in self._waiters.pop(name, []):
+            callback()
+
+    def _report(self, name, state, index, total):
+        if self.on_progress:
+            self.on_progress(name, state, index, total)
+
+    def _finish(self):
+        logging.info("Boot: background sync finished: %s", self.status)
+        if self.on_finished:
+            self.on_finished(dict(self.status))
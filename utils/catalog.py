@@ -0,0 +1,606 @@
+# utils/catalog.py
+import csv
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from config import GS_TAB, UPC_CATALOG_PATH, UPC_CATALOG_BIN_PATH, UPC_KEY_REPORT_PATH
+from config import NEGATIVE_CACHE_SIZE, UPC_CATALOG_DB_PATH
+from utils.google_session import get_session
+from models.product import Product
+from utils.upc_helpers import canonical_gtin
+from utils.catalog_delta import apply_delta, diff_rows, row_hash, row_key, rows_by_upc
+from utils.catalog_db import CatalogDB
+from utils.compiled_catalog import CompiledCatalog, compile_catalog
+from utils.search_index import SearchIndex
+from utils.unknown_scans import UnknownScanLog
+
+# Snapshot headers and the Inv tab columns (0-based) they come from: A,B,C,E,F,G,H,I,J,K,L
+SNAPSHOT_HEADERS = [
+    "UPC", "Brand", "Name", "Size", "Calories", "Sugar", "Sodium",
+    "Price", "Tax %", "QTY", "Image"
+]
+SHEET_COLS = [0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11]
+SHEET_WIDTH = 12  # A..L
+
+
+def normalize_rows(rows):
+    """
+    Sheet rows (header excluded) -> stripped, sheet-shaped A..L rows with a UPC,
+    keeping only the snapshot columns so sheet and snapshot rows compare equal.
+    """
+    out = []
+    for r in rows:
+        if not r:
+            continue
+        if not (r[0] if len(r) > 0 else "").strip():
+            continue
+        row = [""] * SHEET_WIDTH
+        for col in SHEET_COLS:
+            if col < len(r):
+                row[col] = r[col].strip()
+        out.append(row)
+    return out
+
+
+def write_snapshot(rows, path=UPC_CATALOG_PATH):
+    """
+    Write Inv tab rows (header first) to the local CSV snapshot.
+    Written to a temp file and renamed so a crash never leaves a half-written catalog.
+    Returns the number of products written.
+    """
+    records = []
+    for r in rows[1:]:  # Skip header row
+        if not r:  # Skip blanks
+            continue
+        upc = (r[0] if len(r) > 0 else "").strip()
+        if not upc:
+            continue
+        records.append([(r[i].strip() if len(r) > i else "") for i in SHEET_COLS])
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(SNAPSHOT_HEADERS)
+        writer.writerows(records)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(records)
+
+
+def read_snapshot(path=UPC_CATALOG_PATH):
+    """
+    Read the local CSV snapshot back into sheet-shaped rows (A..L, header excluded),
+    so consumers can keep using Inv tab column indexes. Returns [] if missing.
+    """
+    if not path.exists():
+        return []
+    rows = []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header != SNAPSHOT_HEADERS:
+            logging.warning("Catalog: unexpected snapshot header in %s: %s", path, header)
+            return []
+        for vals in reader:
+            if not vals:
+                continue
+            row = [""] * SHEET_WIDTH
+            for i, col in enumerate(SHEET_COLS):
+                if i < len(vals):
+                    row[col] = vals[i]
+            rows.append(row)
+    return rows
+
+
+class SheetFreshness:
+    """
+    Cheap change probe for the inventory spreadsheet.
+    Compares Drive modifiedTime/version against the values stored next to the
+    local snapshot, so the full Inv tab is only downloaded when the sheet changed.
+    """
+
+    def __init__(self, meta_path):
+        self.meta_path = meta_path
+        self.stats = {"hits": 0, "misses": 0, "errors": 0}
+
+    def _load(self):
+        try:
+            if self.meta_path.exists():
+                return json.loads(self.meta_path.read_text())
+        except Exception as e:
+            logging.warning("Catalog: failed to read snapshot meta %s: %s", self.meta_path, e)
+        return {}
+
+    def probe(self, snapshot_path):
+        """
+        Return (changed, remote_meta). changed is True when the sheet must be
+        downloaded: metadata differs, no local snapshot, or the probe failed.
+        """
+        try:
+            session = get_session()
+            sheet_id = session.spreadsheet().id
+            remote = session.drive().files().get(
+                fileId=sheet_id, fields="modifiedTime,version", supportsAllDrives=True
+            ).execute()
+            remote = {"spreadsheet_id": sheet_id,
+                      "modifiedTime": remote.get("modifiedTime"),
+                      "version": remote.get("version")}
+        except Exception as e:
+            self.stats["errors"] += 1
+            logging.warning("Catalog: freshness probe failed, forcing download: %s", e)
+            return True, None
+
+        local = self._load()
+        unchanged = (snapshot_path.exists()
+                     and local.get("spreadsheet_id") == remote["spreadsheet_id"]
+                     and local.get("version") == remote["version"]
+                     and local.get("modifiedTime") == remote["modifiedTime"])
+        if unchanged:
+            self.stats["hits"] += 1
+            logging.info("Catalog: sheet unchanged (version %s), skipping download; %s",
+                         remote["version"], self.stats)
+            return False, remote
+        self.stats["misses"] += 1
+        logging.info("Catalog: sheet changed (version %s -> %s); %s",
+                     local.get("version"), remote["version"], self.stats)
+        return True, remote
+
+    def commit(self, remote_meta):
+        """Record the metadata of the sheet the snapshot was just built from."""
+        if not remote_meta:
+            return
+        tmp_path = self.meta_path.with_name(self.meta_path.name + ".tmp")
+        tmp_path.write_text(json.dumps(remote_meta))
+        os.replace(tmp_path, self.meta_path)
+
+
+class KeyReport:
+    """
+    UPC keying problems found while indexing: rows whose UPCs share one canonical
+    key (only the last row is sellable) and UPCs that fail GTIN check-digit validation.
+    """
+
+    def __init__(self):
+        self.collisions = {}  # key -> [row, ...] in sheet order
+        self.invalid = []     # rows with a non-GTIN or bad check-digit UPC
+
+    def __len__(self):
+        return len(self.collisions) + len(self.invalid)
+
+    def summary(self, limit=5):
+        parts = [f"collisions={len(self.collisions)}", f"invalid={len(self.invalid)}"]
+        if self.collisions:
+            shown = ", ".join(f"{k} x{len(rows)}" for k, rows in list(self.collisions.items())[:limit])
+            parts.append(shown + (" ..." if len(self.collisions) > limit else ""))
+        return ", ".join(parts)
+
+    def write(self, path=UPC_KEY_REPORT_PATH):
+        """Write the report as CSV (kind, key, UPC as in the sheet, name)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(["Kind", "Key", "UPC", "Name"])
+            for key, rows in self.collisions.items():
+                for r in rows:
+                    writer.writerow(["collision", key, r[0], r[2]])
+            for r in self.invalid:
+                writer.writerow(["invalid", row_key(r), r[0], r[2]])
+        os.replace(tmp_path, path)
+
+
+def build_index(rows):
+    """
+    Build a dict of canonical GTIN-14 key -> Product, one key per product.
+    Returns (index, report) where report is a KeyReport.
+    """
+    index = {}
+    rows_by_key = {}
+    report = KeyReport()
+    for r in rows:
+        if not r:
+            continue
+        key, valid = canonical_gtin(r[0] if len(r) > 0 else "")
+        if not key:
+            continue
+        if not valid:
+            report.invalid.append(r)
+        if key in rows_by_key and rows_by_key[key] is not r:
+            report.collisions.setdefault(key, [rows_by_key[key]]).append(r)
+        rows_by_key[key] = r
+    for key, r in rows_by_key.items():
+        index[key] = Product.from_row(r, key)
+    return index, report
+
+
+class CatalogLoader:
+    """
+    Offline-first UPC index, shared by every mode through get_catalog().
+    load_snapshot() maps the compiled catalog (or opens the SQLite store, or parses
+    the CSV snapshot) in milliseconds; refresh_from_sheet() rebuilds it from the live
+    Inv tab (on a background thread) and swaps the new index in atomically, so a scan
+    never waits on the network. The index is a CompiledCatalog, a CatalogDB, or a
+    key dict fallback; the CatalogDB is kept in step either way and serves search().
+    """
+
+    def __init__(self, path=UPC_CATALOG_PATH, compiled_path=UPC_CATALOG_BIN_PATH,
+                 db_path=UPC_CATALOG_DB_PATH):
+        self.path = path
+        self.compiled_path = compiled_path
+        self.db = CatalogDB(db_path)
+        self.index = {}
+        self.product_count = 0
+        self.source = None  # "compiled", "snapshot" or "sheet"
+        self.loaded_at = 0.0
+        self.version = 0  # bumped on every swap
+        # Type-ahead index, rebuilt off the Tk thread after each change; until then the
+        # previous one keeps answering (matches are resolved through the live index)
+        self.search_index = None
+        self._refresh_lock = threading.Lock()
+        self.freshness = SheetFreshness(path.with_name(path.stem + ".meta.json"))
+        # Per-product state for row-level delta sync
+        self._by_upc = {}  # key -> sheet-shaped row (source of the snapshot and delta)
+        self._hashes = {}  # UPC -> row hash
+        self.last_delta = None
+        self.key_report = None
+        self.on_delta = None  # callback(CatalogDelta), called from the refreshing thread
+        # Negative cache: recent unknown keys for the current index version
+        self.unknown_scans = UnknownScanLog()
+        self._misses = OrderedDict()  # key -> None, least recently missed first
+        self._misses_version = 0
+        self._misses_lock = threading.Lock()
+        self.miss_stats = {"cached": 0, "probed": 0}
+        # On-hand QTY after local sales, until the sheet row catches up (utils/stock_writeback.py)
+        self._stock = {}  # key -> qty
+        # Sheet sync metrics; synced_at is the wall time the catalog was last known current
+        self.synced_at = 0.0
+        self.sync_stats = {"syncs": 0, "downloads": 0, "last_duration_s": None,
+                           "last_bytes": 0, "total_bytes": 0}
+
+    def load_snapshot(self):
+        """Load the local snapshot; returns the number of products indexed."""
+        t0 = time.monotonic()
+        # The snapshot is as fresh as the last sheet version it was checked against
+        for p in (self.freshness.meta_path, self.path):
+            if p.exists():
+                self.synced_at = max(self.synced_at, p.stat().st_mtime)
+                break
+        compiled = self._open_compiled()
+        if compiled is not None:
+            with self._refresh_lock:
+                # Per-product rows for delta sync are read lazily by the next refresh
+                self._by_upc = {}
+                self._hashes = {}
+                self._swap(compiled, "compiled", compiled.record_count)
+            logging.info("Catalog: mapped %d products (%d keys) from %s in %.1f ms",
+                         compiled.record_count, len(compiled), self.compiled_path.name,
+                         (time.monotonic() - t0) * 1000)
+            return compiled.record_count
+        db_count = self._open_db()
+        if db_count:
+            with self._refresh_lock:
+                self._by_upc = {}
+                self._hashes = {}
+                self._swap(self.db, "db", db_count)
+            logging.info("Catalog: opened %d products from %s in %.1f ms",
+                         db_count, self.db.path.name, (time.monotonic() - t0) * 1000)
+            return db_count
+        try:
+            rows = read_snapshot(self.path)
+        except Exception as e:
+            logging.error("Catalog: failed to read snapshot %s: %s", self.path, e)
+            return 0
+        if not rows:
+            logging.warning("Catalog: no local snapshot at %s", self.path)
+            return 0
+        index, report = build_index(rows)
+        with self._refresh_lock:
+            self._by_upc = rows_by_upc(rows)
+            self._hashes = {upc: row_hash(r) for upc, r in self._by_upc.items()}
+            self.key_report = report
+            self._swap(index, "snapshot", len(self._by_upc))
+        logging.info("Catalog: loaded %d products (%d keys, %s) from snapshot in %.1f ms",
+                     len(rows), len(index), report.summary(), (time.monotonic() - t0) * 1000)
+        return len(self._by_upc)
+
+    def _open_compiled(self):
+        """Map the compiled catalog if it exists and is not older than the CSV snapshot."""
+        if not self.compiled_path.exists():
+            return None
+        if self.path.exists() and self.path.stat().st_mtime > self.compiled_path.stat().st_mtime:
+            logging.info("Catalog: %s is older than the CSV snapshot, ignoring", self.compiled_path.name)
+            return None
+        try:
+            return CompiledCatalog(self.compiled_path)
+        except Exception as e:
+            logging.warning("Catalog: failed to map %s: %s", self.compiled_path, e)
+            return None
+
+    def _open_db(self):
+        """Product count of the SQLite store if it is usable and not older than the CSV; else 0."""
+        try:
+            if not self.db.exists():
+                return 0
+            if self.path.exists() and self.path.stat().st_mtime > self.db.mtime():
+                logging.info("Catalog: %s is older than the CSV snapshot, ignoring", self.db.path.name)
+                return 0
+            return len(self.db)
+        except Exception as e:
+            logging.warning("Catalog: failed to open %s: %s", self.db.path, e)
+            return 0
+
+    def _sync_db(self, delta, by_upc):
+        """Bring the SQLite store in step: apply the delta, or rebuild if it has drifted."""
+        t0 = time.monotonic()
+        try:
+            rebuilt = False
+            if delta and len(self.db):
+                self.db.apply_delta(delta)
+            if len(self.db) != len(by_upc):
+                self.db.rebuild(list(by_upc.values()))
+                rebuilt = True
+        except Exception as e:
+            logging.error("Catalog: failed to update %s: %s", self.db.path, e)
+            return
+        if delta or rebuilt:
+            logging.info("Catalog: %s %s (%d products) in %.1f ms", "rebuilt" if rebuilt else "updated",
+                         self.db.path.name, len(by_upc), (time.monotonic() - t0) * 1000)
+
+    def _compile(self, rows):
+        """Compile rows and map the result; None if the compiled file can't be written."""
+        t0 = time.monotonic()
+        try:
+            records, keys = compile_catalog(rows, self.compiled_path)
+            compiled = CompiledCatalog(self.compiled_path)
+        except Exception as e:
+            logging.error("Catalog: failed to compile %s: %s", self.compiled_path, e)
+            return None
+        logging.info("Catalog: compiled %d products (%d keys) in %.1f ms",
+                     records, keys, (time.monotonic() - t0) * 1000)
+        return compiled
+
+    def _ensure_rows(self):
+        """Load per-product rows for delta sync when the index came from a file-backed store."""
+        if not self._by_upc and isinstance(self.index, (CompiledCatalog, CatalogDB)):
+            self._by_upc = rows_by_upc(self.index.rows())
+            self._hashes = {upc: row_hash(r) for upc, r in self._by_upc.items()}
+
+    def refresh_from_sheet(self, force=False):
+        """
+        Download the Inv tab, rewrite the snapshot and swap in a new index.
+        Skipped when the Drive freshness probe says the sheet has not changed.
+        """
+        t0 = time.monotonic()
+        changed, remote_meta = self.freshness.probe(self.path)
+        # Approximate bytes transferred: the JSON size of what the APIs returned
+        nbytes = len(json.dumps(remote_meta)) if remote_meta else 0
+        if not changed and not force:
+            if not self.index:
+                self.load_snapshot()
+            self._record_sync(t0, nbytes, downloaded=False)
+            return self.product_count
+        rows = get_session().worksheet(GS_TAB).get_all_values()
+        nbytes += len(json.dumps(rows))
+        count = self.refresh_from_rows(rows)
+        if count:
+            self.freshness.commit(remote_meta)
+            self._record_sync(t0, nbytes, downloaded=True)
+        return count
+
+    def _record_sync(self, t0, nbytes, downloaded):
+        stats = self.sync_stats
+        stats["syncs"] += 1
+        stats["downloads"] += 1 if downloaded else 0
+        stats["last_duration_s"] = round(time.monotonic() - t0, 3)
+        stats["last_bytes"] = nbytes
+        stats["total_bytes"] += nbytes
+        self.synced_at = time.time()
+
+    def sync_age(self):
+        """Seconds since the catalog was last confirmed current with the sheet (inf if never)."""
+        if not self.synced_at:
+            return float("inf")
+        return max(0.0, time.time() - self.synced_at)
+
+    def refresh_from_rows(self, rows):
+        """
+        Apply Inv tab rows (header first) to the live index and snapshot.
+        When an index is already loaded only inserted/updated/deleted products
+        are re-indexed, and the snapshot is left alone if nothing changed.
+        """
+        if not rows:
+            logging.error("Catalog: sheet returned no rows")
+            return 0
+        new_rows = normalize_rows(rows[1:])
+        with self._refresh_lock:
+            self._ensure_rows()
+            delta, by_upc, hashes = diff_rows(self._by_upc, self._hashes, new_rows)
+            # Keep the existing row objects for unchanged products
+            for upc, row in self._by_upc.items():
+                if hashes.get(upc) == self._hashes.get(upc):
+                    by_upc[upc] = row
+            self.last_delta = delta
+
+            if delta or not self.path.exists():
+                # CSV has no in-place update; rewrite it only when products changed
+                write_snapshot([SNAPSHOT_HEADERS] + new_rows, self.path)
+                self._report_keys(new_rows)
+            self._sync_db(delta, by_upc)
+
+            # Recompile the mapped catalog only when products changed (or it is missing)
+            index = self.index
+            if delta or not isinstance(index, CompiledCatalog):
+                index = self._compile(list(by_upc.values()))
+            if index is None:
+                # No compiled file: fall back to patching the in-memory variant dict
+                if isinstance(self.index, dict) and self.index:
+                    index = apply_delta(self.index, delta) if delta else self.index
+                else:
+                    index, _ = build_index(list(by_upc.values()))
+                    logging.info("Catalog: built %d keys from sheet", len(index))
+
+            self._by_upc = by_upc
+            self._hashes = hashes
+            self._swap(index, "sheet", len(by_upc))
+
+        logging.info("Catalog: sheet sync %s", delta.summary())
+        if delta or self.search_index is None:
+            self.prepare_search(rebuild=True)
+        if delta and self.on_delta:
+            self.on_delta(delta)
+        return len(by_upc)
+
+    def _report_keys(self, rows):
+        """Check every sheet row's UPC key and write the collision/invalid report."""
+        _, report = build_index(rows)
+        self.key_report = report
+        if report:
+            logging.warning("Catalog: UPC key report: %s (see %s)", report.summary(), UPC_KEY_REPORT_PATH.name)
+        try:
+            report.write()
+        except Exception as e:
+            logging.error("Catalog: failed to write UPC key report: %s", e)
+
+    def _swap(self, index, source, product_count):
+        # Single reference assignment: readers see the old or the new index, never a mix
+        self.index = index
+        self.product_count = product_count
+        self.source = source
+        self.loaded_at = time.time()
+        self.version += 1
+
+    def lookup(self, code):
+        """
+        Return (key, Product) for a scanned or typed code, or (key, None) if not in the catalog.
+        Misses are counted in unknown_scans; repeats of a recent miss skip the index.
+        """
+        key, valid = canonical_gtin(code)
+        # Version before index: a swap publishes the index first, so a miss is never
+        # cached against a newer version than the index it was probed in
+        version = self.version
+        index = self.index
+        with self._misses_lock:
+            if self._misses_version != version:
+                self._misses.clear()
+                self._misses_version = version
+            cached = key in self._misses
+            if cached:
+                self._misses.move_to_end(key)
+                self.miss_stats["cached"] += 1
+        product = None if cached else index.get(key)
+        if product is not None:
+            qty = self._stock.get(key)
+            return key, product if qty is None else product.with_qty(qty)
+
+        if not cached:
+            with self._misses_lock:
+                self.miss_stats["probed"] += 1
+                if self._misses_version == version:
+                    self._misses[key] = None
+                    if len(self._misses) > NEGATIVE_CACHE_SIZE:
+                        self._misses.popitem(last=False)
+        count = self.unknown_scans.record(key, code)
+        if count == 1:
+            logging.info("Catalog: unknown %s %r (key %r)", "UPC" if valid else "code", code, key)
+        else:
+            logging.debug("Catalog: unknown %r seen %d times (cached=%s)", key, count, cached)
+        return key, None
+
+    def stock(self, key):
+        """Current on-hand QTY for key (local sales included), or None if unknown."""
+        qty = self._stock.get(key)
+        if qty is not None:
+            return qty
+        product = self.index.get(key)
+        return product.qty if product is not None else None
+
+    def set_stock(self, key, qty):
+        """Override key's on-hand QTY until the sheet catches up; None drops the override."""
+        if qty is None:
+            self._stock.pop(key, None)
+        else:
+            self._stock[key] = qty
+
+    def products(self):
+        """Iterate every Product in the current index version."""
+        index = self.index  # one snapshot of the reference for the whole walk
+        if isinstance(index, (CompiledCatalog, CatalogDB)):
+            return index.products()
+        return iter(list(index.values()))
+
+    def prepare_search(self, rebuild=False):
+        """Build the type-ahead index (if missing, or always with rebuild); returns its size."""
+        if self.search_index is not None and not rebuild:
+            return len(self.search_index)
+        t0 = time.monotonic()
+        search_index = SearchIndex(self.products())
+        self.search_index = search_index
+        logging.info("Catalog: type-ahead index over %d products (%d words) in %.0f ms",
+                     len(search_index), len(search_index.vocab), (time.monotonic() - t0) * 1000)
+        return len(search_index)
+
+    def typeahead(self, text, limit=8):
+        """
+        Top matching Products for partly typed text (manual entry keyboard).
+        Until the boot stage has built the type-ahead index, search() answers
+        instead of building it on the calling (Tk) thread.
+        """
+        search_index = self.search_index
+        if search_index is None:
+            return self.search(text, limit)
+        index = self.index
+        results = []
+        for key in search_index.query(text, limit):
+            product = index.get(key)
+            if product is not None:
+                results.append(product)
+        return results
+
+    def search(self, text, limit=20):
+        """
+        Products whose brand/name/size match every word of text (case-insensitive),
+        or whose UPC contains it when text is all digits. Name search goes to the
+        SQLite FTS index when it is populated, otherwise it is a linear scan.
+        """
+        words = (text or "").lower().split()
+        if not words:
+            return []
+        digits = "".join(words) if "".join(words).isdigit() else None
+        if digits is None:
+            try:
+                if self.db.exists() and len(self.db):
+                    return self.db.search(text, limit)
+            except Exception as e:
+                logging.error("Catalog: SQLite search failed, scanning instead: %s", e)
+        results = []
+        for p in self.products():
+            if digits is not None:
+                match = digits in p.upc
+            else:
+                hay = f"{p.brand} {p.name} {p.size}".lower()
+                match = all(w in hay for w in words)
+            if match:
+                results.append(p)
+                if len(results) >= limit:
+                    break
+        return results
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """Return the process-wide catalog, loading the local snapshot on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = CatalogLoader()
+            _catalog.load_snapshot()
+        return _catalog
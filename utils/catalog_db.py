@@ -0,0 +1,162 @@
+# utils/catalog_db.py
+import logging
+import sqlite3
+import threading
+
+from config import UPC_CATALOG_DB_PATH
+from models.product import Product
+from utils.catalog_delta import row_key
+
+FIELD_SEP = "\x1f"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    key         TEXT PRIMARY KEY,
+    upc         TEXT NOT NULL,
+    brand       TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    size        TEXT NOT NULL,
+    price_cents INTEGER,
+    taxable     INTEGER NOT NULL,
+    qty         INTEGER,
+    image       TEXT NOT NULL,
+    row         TEXT NOT NULL
+) WITHOUT ROWID;
+-- Older files had brand/name indexes, which the LIKE '%w%' fallback can't use
+DROP INDEX IF EXISTS products_brand;
+DROP INDEX IF EXISTS products_name;
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    key UNINDEXED, text, tokenize = 'unicode61'
+);
+"""
+
+
+def _fts_query(text):
+    """'coke zer' -> '"coke"* AND "zer"*' (prefix match on every word)."""
+    words = [w.replace('"', "") for w in (text or "").split()]
+    return " AND ".join(f'"{w}"*' for w in words if w)
+
+
+class CatalogDB:
+    """
+    SQLite copy of the catalog, kept in step by the sheet sync.
+    Primary key is the canonical GTIN-14; an FTS5 table serves name search
+    (manual entry until its type-ahead index is built). Supports get() and
+    len() like the other indexes.
+    One connection per thread; WAL lets scans read while a sync writes.
+    """
+
+    def __init__(self, path=UPC_CATALOG_DB_PATH):
+        self.path = path
+        self._local = threading.local()  # sqlite3 connections are per thread
+        self.has_fts = True
+        self._count = None
+
+    def exists(self):
+        return self.path.exists()
+
+    def mtime(self):
+        """Last write time; with WAL, recent commits only touch the -wal file."""
+        wal = self.path.with_name(self.path.name + "-wal")
+        return max(p.stat().st_mtime for p in (self.path, wal) if p.exists())
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            try:
+                conn.executescript(FTS_SCHEMA)
+            except sqlite3.OperationalError as e:
+                # SQLite built without FTS5: search falls back to a LIKE scan of brand and name
+                self.has_fts = False
+                logging.warning("CatalogDB: FTS5 unavailable, using LIKE search: %s", e)
+            self._local.conn = conn
+        return conn
+
+    # ---- Writes (sync thread) ----
+    def _upsert(self, conn, key, row):
+        p = Product.from_row(row, key)
+        conn.execute(
+            "INSERT OR REPLACE INTO products VALUES (?,?,?,?,?,?,?,?,?,?)",
+            (key, p.upc, p.brand, p.name, p.size, p.price_cents, int(p.taxable), p.qty,
+             p.image, FIELD_SEP.join(row)))
+        if self.has_fts:
+            conn.execute("DELETE FROM products_fts WHERE key = ?", (key,))
+            conn.execute("INSERT INTO products_fts (key, text) VALUES (?, ?)",
+                         (key, " ".join(x for x in (p.brand, p.name, p.size) if x)))
+
+    def _delete(self, conn, key):
+        conn.execute("DELETE FROM products WHERE key = ?", (key,))
+        if self.has_fts:
+            conn.execute("DELETE FROM products_fts WHERE key = ?", (key,))
+
+    def rebuild(self, rows):
+        """Replace every product with rows (normalized, one per key), in one transaction."""
+        conn = self._conn()
+        with conn:
+            conn.execute("DELETE FROM products")
+            if self.has_fts:
+                conn.execute("DELETE FROM products_fts")
+            for r in rows:
+                self._upsert(conn, row_key(r), r)
+        self._count = None
+        return len(self)
+
+    def apply_delta(self, delta):
+        """Apply a CatalogDelta in one transaction; readers see all of it or none."""
+        conn = self._conn()
+        with conn:
+            for old in delta.deleted:
+                self._delete(conn, row_key(old))
+            for new in delta.inserted + [new for _, new in delta.updated]:
+                self._upsert(conn, row_key(new), new)
+        self._count = None
+
+    # ---- Reads ----
+    def __len__(self):
+        if self._count is None:
+            self._count = self._conn().execute("SELECT COUNT(*) FROM products").fetchone()[0]
+        return self._count
+
+    def get(self, key, default=None):
+        hit = self._conn().execute("SELECT row FROM products WHERE key = ?", (key,)).fetchone()
+        return Product.from_row(hit[0].split(FIELD_SEP), key) if hit else default
+
+    def rows(self):
+        for (row,) in self._conn().execute("SELECT row FROM products"):
+            yield row.split(FIELD_SEP)
+
+    def products(self):
+        for key, row in self._conn().execute("SELECT key, row FROM products"):
+            yield Product.from_row(row.split(FIELD_SEP), key)
+
+    def search(self, text, limit=20):
+        """Products matching every word of text as a prefix (FTS5), best match first."""
+        query = _fts_query(text)
+        if not query:
+            return []
+        conn = self._conn()
+        if self.has_fts:
+            cur = conn.execute(
+                "SELECT p.key, p.row FROM products_fts f JOIN products p ON p.key = f.key"
+                " WHERE products_fts MATCH ? ORDER BY f.rank LIMIT ?", (query, limit))
+        else:
+            words = [w for w in text.split() if w]
+            where = " AND ".join(["(brand LIKE ? OR name LIKE ?)"] * len(words))
+            params = [v for w in words for v in (f"%{w}%", f"%{w}%")]
+            cur = conn.execute(f"SELECT key, row FROM products WHERE {where} ORDER BY name LIMIT ?",
+                               params + [limit])
+        return [Product.from_row(row.split(FIELD_SEP), key) for key, row in cur]
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
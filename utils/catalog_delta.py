@@ -0,0 +1,93 @@
+# utils/catalog_delta.py
+import hashlib
+
+from models.product import Product
+from utils.upc_helpers import canonical_gtin
+
+
+def row_upc(row):
+    return (row[0] if row else "").strip()
+
+
+def row_key(row):
+    """Canonical GTIN-14 index key of a catalog row."""
+    return canonical_gtin(row_upc(row))[0]
+
+
+def row_hash(row):
+    """Stable short hash of a normalized catalog row."""
+    return hashlib.blake2b("\x1f".join(row).encode("utf-8"), digest_size=8).digest()
+
+
+def rows_by_upc(rows):
+    """Canonical key -> row for normalized rows (last row wins, like the index)."""
+    by_upc = {}
+    for r in rows:
+        key = row_key(r)
+        if key:
+            by_upc[key] = r
+    return by_upc
+
+
+class CatalogDelta:
+    """Inserted / updated / deleted products between two catalog snapshots."""
+
+    def __init__(self):
+        self.inserted = []  # new rows
+        self.updated = []   # (old row, new row)
+        self.deleted = []   # old rows
+
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.deleted)
+
+    def __len__(self):
+        return len(self.inserted) + len(self.updated) + len(self.deleted)
+
+    def summary(self, limit=5):
+        def upcs(rows):
+            shown = ", ".join(row_upc(r) for r in rows[:limit])
+            return shown + (" ..." if len(rows) > limit else "")
+        parts = [f"+{len(self.inserted)} ~{len(self.updated)} -{len(self.deleted)}"]
+        if self.inserted:
+            parts.append(f"inserted: {upcs(self.inserted)}")
+        if self.updated:
+            parts.append(f"updated: {upcs([new for _, new in self.updated])}")
+        if self.deleted:
+            parts.append(f"deleted: {upcs(self.deleted)}")
+        return "; ".join(parts)
+
+
+def diff_rows(old_by_upc, old_hashes, new_rows):
+    """
+    Compare new normalized rows against the current products.
+    Returns (delta, new_by_upc, new_hashes).
+    """
+    delta = CatalogDelta()
+    new_by_upc = rows_by_upc(new_rows)
+    new_hashes = {}
+    for upc, row in new_by_upc.items():
+        h = row_hash(row)
+        new_hashes[upc] = h
+        old_h = old_hashes.get(upc)
+        if old_h is None:
+            delta.inserted.append(row)
+        elif old_h != h:
+            delta.updated.append((old_by_upc[upc], row))
+    for upc, row in old_by_upc.items():
+        if upc not in new_by_upc:
+            delta.deleted.append(row)
+    return delta, new_by_upc, new_hashes
+
+
+def apply_delta(index, delta):
+    """
+    Return a copy of the key -> Product index with the delta applied.
+    Only the keys of changed products are touched; the copy is swapped in by the caller.
+    """
+    index = dict(index)
+    for old in delta.deleted:
+        index.pop(row_key(old), None)
+    for new in delta.inserted + [new for _, new in delta.updated]:
+        key = row_key(new)
+        index[key] = Product.from_row(new, key)
+    return index
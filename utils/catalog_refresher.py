@@ -0,0 +1,94 @@
+# utils/catalog_refresher.py
+import logging
+
+from config import CATALOG_REFRESH_INTERVAL_S, CATALOG_MAX_STALE_S
+from utils.store_hours import StoreHours
+
+
+class CatalogRefresher:
+    """
+    Periodically refreshes the shared catalog on the background worker.
+    Every interval_s a refresh is started unless the store is closed (quiet hours),
+    but a catalog older than max_stale_s is always refreshed. Scans never wait:
+    the new index is swapped in by the catalog when the download finishes.
+    """
+
+    def __init__(self, root, worker, catalog, interval_s=CATALOG_REFRESH_INTERVAL_S,
+                 max_stale_s=CATALOG_MAX_STALE_S, hours=None):
+        self.root = root
+        self.worker = worker
+        self.catalog = catalog
+        self.interval_s = interval_s
+        self.max_stale_s = max_stale_s
+        self.hours = hours or StoreHours()
+        self._after = None
+        self._running = False
+        self.on_refreshed = None  # callback(count) on the Tk thread after each successful refresh
+        self.stats = {"runs": 0, "failures": 0, "quiet_skips": 0, "stale_overrides": 0}
+
+    def start(self):
+        if self._after is None:
+            logging.info("Catalog refresher: every %ds, max staleness %ds", self.interval_s, self.max_stale_s)
+            self._schedule()
+
+    def stop(self):
+        if self._after:
+            try:
+                self.root.after_cancel(self._after)
+            except Exception:
+                pass
+            self._after = None
+
+    def _schedule(self):
+        self._after = self.root.after(int(self.interval_s * 1000), self._tick)
+
+    def _tick(self):
+        self._schedule()
+        age = self.catalog.sync_age()
+        stale = age > self.max_stale_s
+        if not stale and not self.hours.is_open():
+            self.stats["quiet_skips"] += 1
+            logging.debug("Catalog refresher: store closed, skipping (age %.0fs)", age)
+            return
+        if stale and not self.hours.is_open():
+            self.stats["stale_overrides"] += 1
+        self.refresh_now()
+
+    def refresh_now(self, on_done=None):
+        """Start a refresh on the worker unless one is already running. Returns False if skipped."""
+        if self._running:
+            return False
+        self._running = True
+        self.stats["runs"] += 1
+
+        def done(count):
+            self._running = False
+            self.log_metrics()
+            if self.on_refreshed:
+                self.on_refreshed(count)
+            if on_done:
+                on_done(count)
+
+        def failed(e):
+            self._running = False
+            self.stats["failures"] += 1
+            logging.error("Catalog refresher: refresh failed: %s", e)
+            if on_done:
+                on_done(None)
+
+        self.worker.submit(self.catalog.refresh_from_sheet, on_done=done, on_error=failed)
+        return True
+
+    def metrics(self):
+        """Last-sync age, duration and bytes transferred, plus refresher counters."""
+        sync = dict(self.catalog.sync_stats)
+        age = self.catalog.sync_age()
+        return dict(self.stats, **sync,
+                    last_sync_age_s=None if age == float("inf") else round(age, 1),
+                    stale=age > self.max_stale_s)
+
+    def log_metrics(self):
+        m = self.metrics()
+        log = logging.warning if m["stale"] else logging.info
+        log("Catalog refresher: %s", m)
+        return m
@@ -0,0 +1,128 @@
+# utils/compiled_catalog.py
+import logging
+import mmap
+import os
+import struct
+
+from models.product import Product
+from utils.upc_helpers import canonical_gtin
+
+# File layout (little-endian):
+#   header   MAGIC, key_count, record_count, keys_off, records_off, pool_off, pool_size
+#   keys     key_count x (KEY_W bytes, NUL-padded, sorted) + u32 record index
+#            (one canonical GTIN-14 key per product, see canonical_gtin)
+#   records  record_count x (u32 pool offset, u32 length)
+#   pool     UTF-8 record strings, fields joined by FIELD_SEP
+MAGIC = b"SCCAT001"
+HEADER = struct.Struct("<8sIIQQQQ")
+KEY_W = 16
+KEY_ENTRY = struct.Struct(f"<{KEY_W}sI")
+RECORD = struct.Struct("<II")
+FIELD_SEP = "\x1f"
+
+
+def compile_catalog(rows, path):
+    """
+    Compile normalized catalog rows into the binary lookup file.
+    Each product gets one fixed-width canonical key; keys longer than KEY_W are skipped.
+    Written to a temp file and renamed so open readers keep their old mapping.
+    Returns (record_count, key_count).
+    """
+    pool = bytearray()
+    records = []
+    keys = {}
+    skipped = 0
+    for i, r in enumerate(rows):
+        data = FIELD_SEP.join(r).encode("utf-8")
+        records.append((len(pool), len(data)))
+        pool += data
+        k = canonical_gtin(r[0] if r else "")[0].encode("utf-8")
+        if not k:
+            continue
+        if len(k) > KEY_W:
+            skipped += 1
+            continue
+        keys[k.ljust(KEY_W, b"\0")] = i  # last row wins, like the dict index
+
+    sorted_keys = sorted(keys.items())
+    keys_off = HEADER.size
+    records_off = keys_off + len(sorted_keys) * KEY_ENTRY.size
+    pool_off = records_off + len(records) * RECORD.size
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(sorted_keys), len(records),
+                            keys_off, records_off, pool_off, len(pool)))
+        f.write(b"".join(KEY_ENTRY.pack(k, i) for k, i in sorted_keys))
+        f.write(b"".join(RECORD.pack(off, n) for off, n in records))
+        f.write(pool)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if skipped:
+        logging.warning("Catalog: %d UPC keys longer than %d bytes not compiled", skipped, KEY_W)
+    return len(records), len(sorted_keys)
+
+
+class CompiledCatalog:
+    """
+    Read-only, memory-mapped view of a compiled catalog.
+    Opening costs one mmap; lookups binary-search the key table and decode
+    only the matched record into a Product. Supports get() and len() like the dict index.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, self.key_count, self.record_count, self._keys_off,
+         self._records_off, self._pool_off, pool_size) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or self._pool_off + pool_size > len(self._mm):
+            self._mm.close()
+            raise ValueError(f"not a compiled catalog: {path}")
+
+    def __len__(self):
+        return self.key_count
+
+    def _key_at(self, i):
+        off = self._keys_off + i * KEY_ENTRY.size
+        return self._mm[off:off + KEY_W]
+
+    def record(self, i):
+        """Decode record i back into a sheet-shaped row list."""
+        off, n = RECORD.unpack_from(self._mm, self._records_off + i * RECORD.size)
+        start = self._pool_off + off
+        return self._mm[start:start + n].decode("utf-8").split(FIELD_SEP)
+
+    def rows(self):
+        for i in range(self.record_count):
+            yield self.record(i)
+
+    def products(self):
+        """Decode every record into a Product (for scans over the whole catalog)."""
+        for row in self.rows():
+            yield Product.from_row(row, canonical_gtin(row[0] if row else "")[0])
+
+    def get(self, key, default=None):
+        k = (key or "").encode("utf-8")
+        if not k or len(k) > KEY_W:
+            return default
+        k = k.ljust(KEY_W, b"\0")
+        lo, hi = 0, self.key_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < k:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.key_count and self._key_at(lo) == k:
+            _, i = KEY_ENTRY.unpack_from(self._mm, self._keys_off + lo * KEY_ENTRY.size)
+            return Product.from_row(self.record(i), key)
+        return default
+
+    def close(self):
+        try:
+            self._mm.close()
+        except Exception:
+            pass
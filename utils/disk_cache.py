@@ -0,0 +1,293 @@
+# utils/disk_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from config import IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_BYTES, IMAGE_CACHE_POLICY
+
+INDEX_NAME = "index.json"
+PART_SUFFIX = ".part"
+NAME_SUFFIX = ".name"  # sidecar holding the image name, so a lost index can be rebuilt
+INDEX_FLUSH_S = 30
+LOW_WATER = 0.9  # evict down to 90% of the budget so one put doesn't evict again next time
+
+
+class DiskImageCache:
+    """
+    Size-capped on-disk cache of downloaded product images.
+    Files live in hashed shard directories (root/ab/<sha1>.<ext>) so no directory
+    grows large, each with a <file>.name sidecar holding its image name. A small
+    JSON access index (name -> size, last access, hits, source tag such as the
+    Drive file id) drives LRU or LFU eviction once the total passes max_bytes.
+    Writes go to a .part file and are renamed into place. Startup removes
+    leftover .part files, drops index entries whose file is gone, re-indexes
+    shard files missing from the index by their sidecar (deleting only files
+    whose sidecar is missing or doesn't match) and moves images from the old
+    flat layout into their shards.
+    """
+
+    def __init__(self, root=IMAGE_CACHE_DIR, max_bytes=IMAGE_CACHE_MAX_BYTES,
+                 policy=IMAGE_CACHE_POLICY):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._entries = {}  # name -> [size, last access (epoch s), hits, tag]
+        self.bytes = 0
+        self._dirty = False
+        self._last_flush = 0.0
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "evicted_bytes": 0}
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._recover()
+
+    # ---- Layout ----
+    def _relpath(self, name):
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        ext = os.path.splitext(name)[1].lower()
+        return os.path.join(digest[:2], digest + ext)
+
+    def path_for(self, name):
+        return self.root / self._relpath(name)
+
+    @staticmethod
+    def _name_path(path):
+        return path.with_name(path.name + NAME_SUFFIX)
+
+    def _write_name(self, name, path):
+        try:
+            self._name_path(path).write_text(name, encoding="utf-8")
+        except OSError as e:
+            logging.error("Image cache: failed to write name sidecar for %s: %s", name, e)
+
+    def _read_name(self, rel):
+        """Image name from rel's sidecar, or None if it is missing or doesn't hash to rel."""
+        try:
+            name = self._name_path(self.root / rel).read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError):
+            return None
+        return name if self._relpath(name) == rel else None
+
+    # ---- Startup recovery ----
+    def _recover(self):
+        index = {}
+        try:
+            index_path = self.root / INDEX_NAME
+            if index_path.exists():
+                with open(index_path, encoding="utf-8") as f:
+                    index = json.load(f)
+        except Exception as e:
+            logging.warning("Image cache: index unreadable, rebuilding: %s", e)
+
+        entries, removed, adopted, rebuilt = {}, 0, 0, 0
+        for name, entry in index.items():
+            path = self.path_for(name)
+            try:
+                entries[name] = [path.stat().st_size, entry[1], entry[2],
+                                 entry[3] if len(entry) > 3 else None]
+            except OSError:
+                removed += 1
+        indexed = {self._relpath(name): name for name in entries}  # shard rel path -> name
+
+        for dirpath, _, files in os.walk(self.root):
+            present = set(files)
+            for fname in files:
+                full = os.path.join(dirpath, fname)
+                rel = os.path.relpath(full, self.root)
+                if fname.endswith((PART_SUFFIX, ".tmp")):
+                    # Interrupted image or index write
+                    self._remove(full)
+                    removed += 1
+                elif fname.endswith(NAME_SUFFIX):
+                    if fname[:-len(NAME_SUFFIX)] not in present:
+                        self._remove(full)  # its image is gone
+                elif dirpath == str(self.root):
+                    if fname == INDEX_NAME:
+                        continue
+                    # Old flat layout: move the image into its shard
+                    try:
+                        target = self.path_for(fname)
+                        target.parent.mkdir(exist_ok=True)
+                        os.replace(full, target)
+                        st = target.stat()
+                        entries[fname] = [st.st_size, st.st_mtime, 0, None]
+                        indexed[self._relpath(fname)] = fname
+                        self._write_name(fname, target)
+                        adopted += 1
+                    except OSError as e:
+                        logging.error("Image cache: failed to adopt %s: %s", fname, e)
+                elif rel in indexed:
+                    if fname + NAME_SUFFIX not in present:
+                        # Cached before sidecars existed
+                        self._write_name(indexed[rel], self.root / rel)
+                else:
+                    # Sharded file without an index entry (e.g. the index was lost): its sidecar names it
+                    name = self._read_name(rel)
+                    try:
+                        st = os.stat(full)
+                    except OSError:
+                        continue
+                    if name is None or name in entries:
+                        self._remove(full)
+                        self._remove(full + NAME_SUFFIX)
+                        removed += 1
+                    else:
+                        entries[name] = [st.st_size, max(st.st_atime, st.st_mtime), 0, None]
+                        rebuilt += 1
+
+        self._entries = entries
+        self.bytes = sum(e[0] for e in entries.values())
+        self._dirty = bool(removed or adopted or rebuilt or len(entries) != len(index))
+        logging.info("Image cache: %d files, %.1f MB (%d adopted, %d re-indexed, %d removed)",
+                     len(entries), self.bytes / 1e6, adopted, rebuilt, removed)
+        self._evict()
+        self.flush()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _remove_files(self, name):
+        path = self.path_for(name)
+        self._remove(path)
+        self._remove(self._name_path(path))
+
+    # ---- Access ----
+    def get(self, name):
+        """Path of the cached file for name (recording the access), or None."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            entry[1] = time.time()
+            entry[2] += 1
+            self._dirty = True
+            self.stats["hits"] += 1
+        self._maybe_flush()
+        return self.path_for(name)
+
+    def tag(self, name):
+        """Source tag stored with name's file (None if untagged or not cached)."""
+        entry = self._entries.get(name)
+        return entry[3] if entry else None
+
+    def retag(self, name, tag):
+        """Record a new source tag for name's file without rewriting it."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[3] != tag:
+                entry[3] = tag
+                self._dirty = True
+
+    def put(self, name, data, tag=None):
+        """Store data (bytes) for name atomically, then evict down to the budget. Returns the path."""
+        path = self.path_for(name)
+        path.parent.mkdir(exist_ok=True)
+        if not self._name_path(path).exists():
+            self._write_name(name, path)
+        # Per-thread part file: a scan and the prefetcher may write the same image at once
+        part = path.with_name(f"{path.name}.{threading.get_ident()}{PART_SUFFIX}")
+        with open(part, "wb") as f:
+            f.write(data)
+        os.replace(part, path)
+        with self._lock:
+            old = self._entries.get(name)
+            hits = old[2] if old else 0
+            if old:
+                self.bytes -= old[0]
+            self._entries[name] = [len(data), time.time(), hits, tag]
+            self.bytes += len(data)
+            self._dirty = True
+            self.stats["writes"] += 1
+        self._evict(keep=name)
+        self._maybe_flush()
+        return path
+
+    def discard(self, name):
+        with self._lock:
+            entry = self._entries.pop(name, None)
+            if entry is None:
+                return
+            self.bytes -= entry[0]
+            self._dirty = True
+        self._remove_files(name)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    # ---- Eviction ----
+    def _evict(self, keep=None):
+        if self.bytes <= self.max_bytes:
+            return
+        with self._lock:
+            if self.policy == "lfu":
+                order = sorted(self._entries, key=lambda n: (self._entries[n][2], self._entries[n][1]))
+            else:
+                order = sorted(self._entries, key=lambda n: self._entries[n][1])
+            victims = []
+            target = self.max_bytes * LOW_WATER
+            for name in order:
+                if self.bytes <= target:
+                    break
+                if name == keep:
+                    continue
+                size = self._entries.pop(name)[0]
+                self.bytes -= size
+                victims.append(name)
+                self.stats["evictions"] += 1
+                self.stats["evicted_bytes"] += size
+            self._dirty = True
+        for name in victims:
+            self._remove_files(name)
+        logging.info("Image cache: evicted %d files (%s), now %.1f MB", len(victims), self.policy,
+                     self.bytes / 1e6)
+
+    # ---- Index persistence ----
+    def _maybe_flush(self):
+        if time.monotonic() - self._last_flush >= INDEX_FLUSH_S:
+            self.flush()
+
+    def flush(self):
+        """Write the access index if it changed (atomic replace)."""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = {name: list(entry) for name, entry in self._entries.items()}
+            self._dirty = False
+        self._last_flush = time.monotonic()
+        try:
+            index_path = self.root / INDEX_NAME
+            tmp_path = index_path.with_name(INDEX_NAME + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, separators=(",", ":"))
+            os.replace(tmp_path, index_path)
+        except Exception as e:
+            self._dirty = True
+            logging.error("Image cache: failed to write index: %s", e)
+
+    def metrics(self):
+        with self._lock:
+            return dict(self.stats, files=len(self._entries), bytes=self.bytes,
+                        max_bytes=self.max_bytes, policy=self.policy)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_disk_cache():
+    """Return the process-wide image disk cache, recovering it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskImageCache()
+        return _cache
@@ -0,0 +1,122 @@
+# utils/drive_file_map.py
+import json
+import logging
+import os
+
+from config import DRIVE_FILE_MAP_PATH
+
+FILE_FIELDS = "id, name, parents, trashed, md5Checksum, modifiedTime"
+PAGE_SIZE = 1000
+
+
+class DriveFileMap:
+    """
+    Persisted map of the image folder: file id -> (name, md5, modifiedTime).
+    The first sync lists the whole folder page by page; after that only the
+    Drive Changes feed since the stored page token is read, which is one small
+    request when nothing changed. An unusable token falls back to a full list.
+    """
+
+    def __init__(self, folder_id, path=DRIVE_FILE_MAP_PATH):
+        self.folder_id = folder_id
+        self.path = path
+        self.page_token = None
+        self.files = {}  # file id -> [name, md5, modifiedTime]
+        self.stats = {"full_syncs": 0, "incremental_syncs": 0, "requests": 0, "changes": 0}
+        self._load()
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                with open(self.path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("folder_id") == self.folder_id:
+                    self.page_token = data.get("page_token")
+                    self.files = data.get("files", {})
+                else:
+                    logging.info("Drive file map: folder changed, will list it again")
+        except Exception as e:
+            logging.error("Drive file map: failed to read %s: %s", self.path, e)
+
+    def _save(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"folder_id": self.folder_id, "page_token": self.page_token,
+                           "files": self.files}, f, separators=(",", ":"))
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error("Drive file map: failed to write %s: %s", self.path, e)
+
+    def by_name(self):
+        """filename -> (file id, md5, modifiedTime); the newest file wins a duplicate name."""
+        out = {}
+        for file_id, (name, md5, modified) in sorted(self.files.items(), key=lambda kv: kv[1][2] or ""):
+            out[name] = (file_id, md5, modified)
+        return out
+
+    # ---- Sync ----
+    def sync(self, drive):
+        """Bring the map up to date; returns the number of files added, changed or removed."""
+        if self.page_token:
+            try:
+                return self._sync_changes(drive)
+            except Exception as e:
+                logging.warning("Drive file map: changes feed failed, listing folder again: %s", e)
+        return self._sync_full(drive)
+
+    def _sync_full(self, drive):
+        # Take the token first so changes made while listing are replayed next time
+        start = drive.changes().getStartPageToken().execute()["startPageToken"]
+        self.stats["requests"] += 1
+        files, page = {}, None
+        query = f"'{self.folder_id}' in parents and trashed=false"
+        while True:
+            resp = drive.files().list(q=query, fields=f"nextPageToken, files({FILE_FIELDS})",
+                                      pageSize=PAGE_SIZE, pageToken=page).execute()
+            self.stats["requests"] += 1
+            for f in resp.get("files", []):
+                files[f["id"]] = [f["name"], f.get("md5Checksum"), f.get("modifiedTime")]
+            page = resp.get("nextPageToken")
+            if not page:
+                break
+        changed = sum(1 for k in files.keys() | self.files.keys() if files.get(k) != self.files.get(k))
+        self.files = files
+        self.page_token = start
+        self.stats["full_syncs"] += 1
+        self._save()
+        logging.info("Drive file map: listed %d files (%d changed)", len(files), changed)
+        return changed
+
+    def _sync_changes(self, drive):
+        changed, page, token = 0, self.page_token, self.page_token
+        while True:
+            resp = drive.changes().list(
+                pageToken=page, pageSize=PAGE_SIZE, spaces="drive",
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))"
+            ).execute()
+            self.stats["requests"] += 1
+            for change in resp.get("changes", []):
+                file_id = change["fileId"]
+                f = change.get("file") or {}
+                in_folder = (not change.get("removed") and not f.get("trashed")
+                             and self.folder_id in f.get("parents", []))
+                entry = [f.get("name"), f.get("md5Checksum"), f.get("modifiedTime")] if in_folder else None
+                if entry != self.files.get(file_id):
+                    if entry is None:
+                        self.files.pop(file_id, None)
+                    else:
+                        self.files[file_id] = entry
+                    changed += 1
+            if resp.get("newStartPageToken"):
+                self.page_token = resp["newStartPageToken"]
+                break
+            page = resp["nextPageToken"]
+        self.stats["incremental_syncs"] += 1
+        self.stats["changes"] += changed
+        if changed:
+            logging.info("Drive file map: %d files changed", changed)
+        if changed or self.page_token != token:
+            self._save()
+        return changed
@@ -0,0 +1,179 @@
+# utils/google_session.py
+import logging
+import threading
+
+from config import GS_CRED_PATH, GS_SHEET_NAME
+
+# Google client libraries are imported on first use: they cost hundreds of
+# milliseconds on a Pi and most modes never need them at import time.
+
+# One scope set for everything the kiosk does, so a single token serves
+# Sheets reads/writes, Drive image downloads and permission checks.
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+
+HTTP_TIMEOUT_S = 30
+
+
+class GoogleSession:
+    """
+    Process-wide Google session shared by every mode.
+    Holds one credentials object, one gspread client (requests keep-alive pool),
+    cached spreadsheet/worksheet handles and per-thread Drive/Sheets clients.
+    """
+
+    def __init__(self, credentials_path=GS_CRED_PATH, scopes=SCOPES):
+        self.credentials_path = credentials_path
+        self.scopes = list(scopes)
+        self._lock = threading.RLock()
+        self._local = threading.local()  # httplib2 is not thread-safe
+        self._creds = None
+        self._gc = None
+        self._spreadsheets = {}  # name -> gspread.Spreadsheet
+        self._worksheets = {}    # (sheet name, tab) -> gspread.Worksheet
+        self.stats = {
+            "sessions_created": 0,
+            "sessions_reused": 0,
+            "tokens_refreshed": 0,
+            "tokens_reused": 0,
+            "gspread_clients_built": 0,
+            "drive_clients_built": 0,
+            "sheets_clients_built": 0,
+            "spreadsheets_opened": 0,
+            "spreadsheets_reused": 0,
+            "worksheets_opened": 0,
+            "worksheets_reused": 0,
+        }
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+    # ---- Credentials / token ----
+    def credentials(self):
+        """Return the shared credentials, loading credentials.json only once."""
+        with self._lock:
+            if self._creds is None:
+                from google.oauth2.service_account import Credentials
+                self._creds = Credentials.from_service_account_file(
+                    str(self.credentials_path), scopes=self.scopes)
+                logging.info("GoogleSession: loaded service account credentials")
+            return self._creds
+
+    def ensure_token(self):
+        """Refresh the access token only when it is missing or expired."""
+        creds = self.credentials()
+        with self._lock:
+            if creds.valid:
+                self._count("tokens_reused")
+                return creds
+            from google.auth.transport.requests import Request
+            creds.refresh(Request())
+            self._count("tokens_refreshed")
+            logging.info("GoogleSession: access token refreshed")
+            return creds
+
+    # ---- Clients ----
+    def gspread_client(self):
+        """Shared gspread client; its AuthorizedSession keeps connections alive."""
+        with self._lock:
+            if self._gc is None:
+                import gspread
+                self._gc = gspread.authorize(self.ensure_token())
+                self._count("gspread_clients_built")
+            else:
+                self.ensure_token()
+            return self._gc
+
+    def _authorized_http(self):
+        http = getattr(self._local, "http", None)
+        if http is None:
+            import httplib2
+            from google_auth_httplib2 import AuthorizedHttp
+            http = AuthorizedHttp(self.credentials(), http=httplib2.Http(timeout=HTTP_TIMEOUT_S))
+            self._local.http = http
+        return http
+
+    def drive(self):
+        """Drive v3 client for the calling thread (built once per thread)."""
+        client = getattr(self._local, "drive", None)
+        if client is None:
+            from googleapiclient.discovery import build
+            client = build("drive", "v3", http=self._authorized_http(), cache_discovery=False)
+            self._local.drive = client
+            self._count("drive_clients_built")
+        return client
+
+    def sheets(self):
+        """Sheets v4 client for the calling thread (built once per thread)."""
+        client = getattr(self._local, "sheets", None)
+        if client is None:
+            from googleapiclient.discovery import build
+            client = build("sheets", "v4", http=self._authorized_http(), cache_discovery=False)
+            self._local.sheets = client
+            self._count("sheets_clients_built")
+        return client
+
+    # ---- Spreadsheet handles ----
+    def spreadsheet(self, name=GS_SHEET_NAME):
+        """Open a spreadsheet by name once; gc.open() costs a Drive search."""
+        gc = self.gspread_client()
+        with self._lock:
+            sh = self._spreadsheets.get(name)
+            if sh is not None:
+                self._count("spreadsheets_reused")
+                return sh
+        sh = gc.open(name)
+        with self._lock:
+            self._spreadsheets[name] = sh
+        self._count("spreadsheets_opened")
+        return sh
+
+    def worksheet(self, tab, sheet_name=GS_SHEET_NAME):
+        """Return a cached worksheet handle from the named spreadsheet."""
+        key = (sheet_name, tab)
+        with self._lock:
+            ws = self._worksheets.get(key)
+            if ws is not None:
+                self._count("worksheets_reused")
+                self.ensure_token()
+                return ws
+        ws = self.spreadsheet(sheet_name).worksheet(tab)
+        with self._lock:
+            self._worksheets[key] = ws
+        self._count("worksheets_opened")
+        return ws
+
+    def reset(self):
+        """Drop every cached client, e.g. after credentials.json is replaced."""
+        with self._lock:
+            self._creds = None
+            self._gc = None
+            self._spreadsheets.clear()
+            self._worksheets.clear()
+            self._local = threading.local()
+        logging.info("GoogleSession: cleared cached clients")
+
+    def log_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        logging.info("GoogleSession stats: %s", stats)
+        return stats
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Return the process-wide GoogleSession, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = GoogleSession()
+            _session._count("sessions_created")
+        else:
+            _session._count("sessions_reused")
+        return _session
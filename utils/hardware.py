@@ -0,0 +1,20 @@
+# utils/hardware.py
+import logging
+
+from config import PIN_RED, PIN_GREEN, PIN_YELLOW, PIN_BLUE, PIN_CLEAR
+
+BUTTON_PINS = (PIN_RED, PIN_GREEN, PIN_YELLOW, PIN_BLUE, PIN_CLEAR)
+
+
+def init_gpio():
+    """
+    Set up the button pins with pull-up resistors and return the GPIO module.
+    Explicit so importing config or any mode never requires real GPIO.
+    """
+    import RPi.GPIO as GPIO
+
+    GPIO.setmode(GPIO.BCM)
+    for pin in BUTTON_PINS:
+        GPIO.setup(pin, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+    logging.info("GPIO initialized for pins %s", BUTTON_PINS)
+    return GPIO
@@ -1,6 +1,12 @@
 # utils/helpers.py
 import subprocess
 
+def center_window(win, width, height):
+    """Place a Toplevel of the given size in the middle of the screen."""
+    x = (win.winfo_screenwidth() - width) // 2
+    y = (win.winfo_screenheight() - height) // 2
+    win.geometry(f"{width}x{height}+{x}+{y}")
+
 def run(cmd):
     try:
         out = subprocess.check_output(cmd, shell=True, stderr=subprocess.DEVNULL, timeout=1.5)
@@ -0,0 +1,70 @@
+# utils/image_lru.py
+import threading
+from collections import OrderedDict
+
+from config import IMAGE_LRU_MAX_BYTES
+
+
+def image_bytes(image):
+    """Approximate decoded size of a PIL image (width x height x bands)."""
+    return image.width * image.height * len(image.getbands())
+
+
+class ImageLRU:
+    """
+    Byte-capped LRU of decoded, ready-to-paste PIL images keyed by (filename, box).
+    Least recently used entries are evicted once the total decoded size passes
+    max_bytes; an image bigger than the whole cap is never stored.
+    """
+
+    def __init__(self, max_bytes=IMAGE_LRU_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items = OrderedDict()  # (filename, box) -> (image, nbytes)
+        self.bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            self._items.move_to_end(key)
+            self.stats["hits"] += 1
+            return item[0]
+
+    def put(self, key, image):
+        nbytes = image_bytes(image)
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._items[key] = (image, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.bytes -= evicted
+                self.stats["evictions"] += 1
+
+    def discard(self, filename):
+        """Drop every box of filename, e.g. after the file was downloaded again."""
+        with self._lock:
+            for key in [k for k in self._items if k[0] == filename]:
+                self.bytes -= self._items.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.bytes = 0
+
+    def metrics(self):
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(self.stats, entries=len(self._items), bytes=self.bytes,
+                        hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else None)
@@ -0,0 +1,119 @@
+# utils/image_prefetch.py
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import IMAGE_PREFETCH_WORKERS, IMAGE_PREFETCH_MAX_BPS, IMAGE_PREFETCH_CHUNK_BYTES
+from utils.google_session import get_session
+
+PROGRESS_EVERY = 25  # report progress every N images
+
+
+class ImagePrefetcher:
+    """
+    Downloads catalog product images (Image column L) into the disk cache in
+    the background, so the first scan of an item doesn't wait on Drive.
+    A small thread pool works through images that are missing or were cached
+    from a different Drive file; workers pause while a scan is downloading
+    and share a bandwidth cap of max_bps, reserved chunk by chunk before each
+    request so bursts stay under the cap too. schedule() after each catalog sync
+    restarts the walk; on_progress(progress) is called from worker threads.
+    """
+
+    def __init__(self, loader, catalog, workers=IMAGE_PREFETCH_WORKERS, max_bps=IMAGE_PREFETCH_MAX_BPS,
+                 chunk_bytes=IMAGE_PREFETCH_CHUNK_BYTES):
+        self.loader = loader
+        self.catalog = catalog
+        self.max_bps = max_bps
+        self.chunk_bytes = chunk_bytes
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._next_slot = 0.0  # monotonic time the bandwidth budget is free again
+        self.progress = {}
+        self.on_progress = None
+
+    def schedule(self):
+        """Queue every image that needs downloading; supersedes a walk still in progress."""
+        if not self.loader.file_map:
+            logging.info("Prefetch: no Drive file map yet, skipping")
+            return 0
+        names = []
+        seen = set()
+        for p in self.catalog.products():
+            name = p.image
+            if name and name not in seen:
+                seen.add(name)
+                if self.loader.needs_download(name):
+                    names.append(name)
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self.progress = {"total": len(names), "done": 0, "downloaded": 0, "failed": 0,
+                             "bytes": 0, "started": time.time()}
+        logging.info("Prefetch: %d of %d catalog images to download", len(names), len(seen))
+        for name in names:
+            self._pool.submit(self._fetch, name, generation)
+        return len(names)
+
+    def _drive(self):
+        drive = getattr(self._local, "drive", None)
+        if drive is None:
+            drive = self._local.drive = get_session().drive()
+        return drive
+
+    def _throttle(self):
+        """Reserve one chunk of the shared bandwidth budget; sleep until it is ours."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot)
+            self._next_slot = start + self.chunk_bytes / self.max_bps
+        if start > now:
+            time.sleep(start - now)
+
+    def _fetch(self, name, generation):
+        if generation != self._generation:
+            return  # superseded by a newer sync
+        # Scans come first: wait while one is downloading
+        self.loader.foreground_idle.wait()
+        ok = False
+        nbytes = 0
+        try:
+            if self.loader.needs_download(name):
+                if self.max_bps:
+                    data = self.loader.download(name, drive=self._drive(), chunksize=self.chunk_bytes,
+                                                before_chunk=self._throttle)
+                else:
+                    data = self.loader.download(name, drive=self._drive())
+                nbytes = len(data)
+            ok = True
+        except Exception as e:
+            logging.warning("Prefetch: failed to download %s: %s", name, e)
+        self._report(generation, ok, nbytes)
+
+    def _report(self, generation, ok, nbytes):
+        with self._lock:
+            if generation != self._generation:
+                return
+            p = self.progress
+            p["done"] += 1
+            p["downloaded" if ok else "failed"] += 1
+            p["bytes"] += nbytes
+            finished = p["done"] == p["total"]
+            snapshot = dict(p)
+        if finished:
+            logging.info("Prefetch: finished %s in %.0fs", snapshot, time.time() - snapshot["started"])
+        elif snapshot["done"] % PROGRESS_EVERY == 0:
+            logging.info("Prefetch: %d/%d images", snapshot["done"], snapshot["total"])
+        if self.on_progress and (finished or snapshot["done"] % PROGRESS_EVERY == 0):
+            try:
+                self.on_progress(snapshot)
+            except Exception as e:
+                logging.error("Prefetch: progress callback failed: %s", e)
+
+    def stop(self):
+        with self._lock:
+            self._generation += 1  # queued fetches return immediately
+        self._pool.shutdown(wait=False)
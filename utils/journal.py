@@ -0,0 +1,234 @@
+# utils/journal.py
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+from config import JOURNAL_DIR, JOURNAL_SEGMENT_BYTES, JOURNAL_COMMIT_INTERVAL_S
+
+_SEGMENT_RE = re.compile(r"^journal-(\d{6})\.log(\.gz)?$")
+
+
+def _encode(record):
+    """One journal line: CRC32 of the payload (hex) + compact JSON."""
+    payload = json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+
+def _decode(line):
+    """Record dict, or None for a torn or corrupted line."""
+    if len(line) < 10 or not line.endswith(b"\n") or line[8:9] != b" ":
+        return None
+    payload = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(payload):
+            return None
+        return json.loads(payload)
+    except ValueError:
+        return None
+
+
+class TransactionJournal:
+    """
+    Crash-safe, append-only journal of completed sales.
+    Records are compact CRC-checked JSON lines. append() returns immediately and
+    a writer thread commits everything queued within commit_interval_s with one
+    write + fsync (group commit); append(record, sync=True) commits before it
+    returns, for records that must survive a power cut at once. Segments rotate at segment_bytes and closed
+    segments are compacted to gzip. A torn last line after a power cut is
+    detected by its CRC and skipped by the reader.
+    """
+
+    def __init__(self, directory=JOURNAL_DIR, segment_bytes=JOURNAL_SEGMENT_BYTES,
+                 commit_interval_s=JOURNAL_COMMIT_INTERVAL_S):
+        self.dir = directory
+        self.segment_bytes = segment_bytes
+        self.commit_interval_s = commit_interval_s
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._io_lock = threading.Lock()      # owns the segment file; taken before _cond
+        self._cond = threading.Condition()    # guards _pending / _closed
+        self._pending = []
+        self._closed = False
+        self._file = None
+        self._segment_no = 0
+        self.stats = {"records": 0, "commits": 0, "bytes": 0, "segments_compacted": 0}
+        self._open_segment()
+        self._thread = threading.Thread(target=self._run, name="journal", daemon=True)
+        self._thread.start()
+
+    # ---- Segments ----
+    def _segments(self):
+        """[(number, path)] of every segment, oldest first."""
+        found = []
+        for p in self.dir.iterdir():
+            m = _SEGMENT_RE.match(p.name)
+            if m:
+                found.append((int(m.group(1)), p))
+        return sorted(found)
+
+    def _segment_path(self, number):
+        return self.dir / f"journal-{number:06d}.log"
+
+    def _open_segment(self):
+        segments = self._segments()
+        last = segments[-1] if segments else None
+        if last and last[1].suffix == ".log" and last[1].stat().st_size < self.segment_bytes:
+            self._segment_no = last[0]
+        else:
+            self._segment_no = (last[0] + 1) if last else 1
+        path = self._segment_path(self._segment_no)
+        self._file = open(path, "ab")
+        size = self._file.tell()
+        if size:
+            # Terminate a torn last line so the next record starts on a line of its own
+            with open(path, "rb") as f:
+                f.seek(size - 1)
+                if f.read(1) != b"\n":
+                    self._file.write(b"\n")
+                    logging.warning("Journal: %s ended mid-record; torn line will be skipped", path.name)
+
+    def _rotate(self):
+        self._file.close()
+        closed = self._segment_no
+        self._segment_no += 1
+        self._file = open(self._segment_path(self._segment_no), "ab")
+        logging.info("Journal: rotated to segment %06d", self._segment_no)
+        self.compact(upto=closed)
+
+    def compact(self, upto=None):
+        """Gzip closed .log segments (all but the open one, or up to segment upto)."""
+        for number, path in self._segments():
+            if path.suffix != ".log" or number == self._segment_no or (upto and number > upto):
+                continue
+            gz_path = path.with_name(path.name + ".gz")
+            tmp_path = gz_path.with_name(gz_path.name + ".tmp")
+            try:
+                with open(path, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+                    dst.write(src.read())
+                os.replace(tmp_path, gz_path)
+                os.remove(path)
+                self.stats["segments_compacted"] += 1
+            except Exception as e:
+                logging.error("Journal: failed to compact %s: %s", path.name, e)
+
+    # ---- Writes ----
+    def append(self, record, sync=False):
+        """Queue a record for the next group commit; with sync, commit it (fsync) before returning."""
+        line = _encode(record)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("journal is closed")
+            self._pending.append(line)
+            self._cond.notify()
+        if sync:
+            self.commit()
+
+    def _write_pending(self):
+        """Write and fsync everything queued so far (caller holds _io_lock)."""
+        with self._cond:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return
+        data = b"".join(batch)
+        try:
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except Exception:
+            # Keep the records for the next commit; a torn partial line is skipped on read
+            with self._cond:
+                self._pending[:0] = batch
+            raise
+        self.stats["records"] += len(batch)
+        self.stats["commits"] += 1
+        self.stats["bytes"] += len(data)
+        if self._file.tell() >= self.segment_bytes:
+            self._rotate()
+
+    def commit(self):
+        """Commit queued records now instead of at the end of the group window."""
+        with self._io_lock:
+            self._write_pending()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._pending:
+                    return
+                # Group window: let more records join this commit
+                deadline = time.monotonic() + self.commit_interval_s
+                while not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            try:
+                with self._io_lock:
+                    self._write_pending()
+            except Exception as e:
+                logging.error("Journal: commit failed: %s", e)
+                time.sleep(self.commit_interval_s)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout=5)
+        with self._io_lock:
+            self._write_pending()
+            self._file.close()
+
+    # ---- Reads ----
+    def read(self, start=None, end=None):
+        """Yield records with start <= record["ts"] < end (epoch seconds), oldest first."""
+        skipped = 0
+        for _, path in self._segments():
+            opener = gzip.open if path.suffix == ".gz" else open
+            try:
+                with opener(path, "rb") as f:
+                    for line in f:
+                        record = _decode(line)
+                        if record is None:
+                            skipped += line.strip() != b""
+                            continue
+                        ts = record.get("ts", 0)
+                        if (start is None or ts >= start) and (end is None or ts < end):
+                            yield record
+            except (OSError, EOFError) as e:
+                logging.error("Journal: failed to read %s: %s", path.name, e)
+        if skipped:
+            logging.warning("Journal: skipped %d damaged records", skipped)
+
+    def summary(self, start=None, end=None):
+        """Sales totals (integer cents) for reporting, overall and per payment method."""
+        totals = {"transactions": 0, "items": 0, "subtotal_cents": 0, "tax_cents": 0,
+                  "total_cents": 0, "by_payment": {}}
+        for r in self.read(start, end):
+            totals["transactions"] += 1
+            totals["items"] += sum(line[1] for line in r.get("items", []))
+            totals["subtotal_cents"] += r.get("sub", 0)
+            totals["tax_cents"] += r.get("tax", 0)
+            totals["total_cents"] += r.get("tot", 0)
+            pay = totals["by_payment"].setdefault(r.get("pay", "unknown"), {"transactions": 0, "total_cents": 0})
+            pay["transactions"] += 1
+            pay["total_cents"] += r.get("tot", 0)
+        return totals
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_journal():
+    """Return the process-wide transaction journal, opening it on first use."""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            _journal = TransactionJournal()
+        return _journal
@@ -0,0 +1,101 @@
+# utils/search_index.py
+import bisect
+import heapq
+import re
+
+NGRAM = 3
+_WORD_RE = re.compile(r"[0-9a-z]+")
+
+
+def _words(text):
+    return _WORD_RE.findall((text or "").lower())
+
+
+def _ngrams(word):
+    return {word[i:i + NGRAM] for i in range(len(word) - NGRAM + 1)}
+
+
+class SearchIndex:
+    """
+    In-memory type-ahead index over product Brand, Name and Size.
+    Every distinct word gets a posting list of product ids. Query words match
+    words by prefix (binary search over the sorted vocabulary) or, from three
+    letters on, anywhere inside a word via a trigram index. Only keys and
+    display names are held; matches are resolved through the live catalog.
+    """
+
+    def __init__(self, products):
+        self.keys = []     # product id -> catalog key
+        self.names = []    # product id -> lowercase "brand name size" (for ranking)
+        postings = {}      # word -> [product id]
+        for p in products:
+            pid = len(self.keys)
+            self.keys.append(p.key)
+            self.names.append(p.display_name.lower())
+            for w in set(_words(p.display_name)):
+                postings.setdefault(w, []).append(pid)
+
+        self.vocab = sorted(postings)                      # word id -> word
+        self.postings = [postings[w] for w in self.vocab]  # word id -> [product id]
+        self.grams = {}                                    # trigram -> {word id}
+        for wid, w in enumerate(self.vocab):
+            for g in _ngrams(w):
+                self.grams.setdefault(g, set()).add(wid)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _prefix_words(self, q):
+        lo = bisect.bisect_left(self.vocab, q)
+        hi = bisect.bisect_left(self.vocab, q + "\uffff")
+        return range(lo, hi)
+
+    def _infix_words(self, q):
+        grams = sorted(_ngrams(q), key=lambda g: len(self.grams.get(g, ())))
+        if not grams:
+            return set()
+        wids = set(self.grams.get(grams[0], ()))
+        for g in grams[1:]:
+            wids &= self.grams.get(g, set())
+            if not wids:
+                break
+        return {wid for wid in wids if q in self.vocab[wid]}
+
+    def _match(self, q):
+        """Product ids with a word starting with q, and those with q inside a word."""
+        prefix = set()
+        for wid in self._prefix_words(q):
+            prefix.update(self.postings[wid])
+        infix = set()
+        if len(q) >= NGRAM:
+            for wid in self._infix_words(q):
+                infix.update(self.postings[wid])
+            infix -= prefix
+        return prefix, infix
+
+    def query(self, text, limit=8):
+        """
+        Catalog keys of the best matches for text, best first. Every query word
+        must match; prefix matches rank above infix ones, then names that start
+        with the query, then shorter names.
+        """
+        words = _words(text)
+        if not words:
+            return []
+        candidates = None
+        weak = set()
+        # Most selective (longest) word first keeps the intersections small
+        for q in sorted(words, key=len, reverse=True):
+            prefix, infix = self._match(q)
+            hits = prefix | infix
+            candidates = hits if candidates is None else candidates & hits
+            weak |= infix
+            if not candidates:
+                return []
+        head = " ".join(words)
+
+        def rank(pid):
+            name = self.names[pid]
+            return (pid in weak, not name.startswith(head), len(name), name)
+
+        return [self.keys[pid] for pid in heapq.nsmallest(limit, candidates, key=rank)]
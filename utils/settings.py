@@ -0,0 +1,143 @@
+# utils/settings.py
+import json
+import logging
+import os
+import threading
+import time
+
+from config import GS_CRED_TAB, CRED_DIR, SETTINGS_TTL_S
+from utils.google_session import get_session
+
+# Whole Credentials column B in one ranged read
+SETTINGS_RANGE = "B1:B40"
+SETTINGS_CACHE_PATH = CRED_DIR / "settings_cache.json"
+
+
+class CredentialSettings:
+    """Typed view of the Credentials tab (column B)."""
+
+    # attribute -> row number in column B
+    CELLS = {
+        "cred_email": 10,
+        "folder_id": 12,
+        "machine_id": 16,
+        "cloudflared_host": 18,
+        "portal_url": 21,
+        "zipcode": 24,
+        "weather_api_key": 25,
+        "tax_rate_raw": 27,
+    }
+
+    def __init__(self, column_b=None, fetched_at=0.0):
+        column_b = column_b or []
+        self.column_b = list(column_b)
+        self.fetched_at = fetched_at
+
+        def cell(row):
+            i = row - 1
+            return (column_b[i] if i < len(column_b) else "").strip()
+
+        self.cred_email: str = cell(self.CELLS["cred_email"])
+        self.folder_id: str = cell(self.CELLS["folder_id"])
+        self.machine_id: str = cell(self.CELLS["machine_id"])
+        self.cloudflared_host: str = cell(self.CELLS["cloudflared_host"])
+        self.portal_url: str = cell(self.CELLS["portal_url"])
+        self.zipcode: str = cell(self.CELLS["zipcode"])
+        self.weather_api_key: str = cell(self.CELLS["weather_api_key"])
+        self.tax_rate_raw: str = cell(self.CELLS["tax_rate_raw"])
+        self.tax_rate = self._parse_percent(self.tax_rate_raw)  # float percent or None
+
+    @staticmethod
+    def _parse_percent(value):
+        # Parse tax rate (remove % sign if present)
+        value = (value or "").replace('%', '').strip()
+        if not value:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            logging.error(f"Invalid tax rate in spreadsheet: {value}")
+            return None
+
+    def age(self):
+        return time.time() - self.fetched_at if self.fetched_at else float("inf")
+
+
+class SettingsStore:
+    """
+    Caches CredentialSettings in memory and on disk.
+    get() only goes to the network when the cache is older than the TTL;
+    refresh() forces one batch_get of the whole column.
+    """
+
+    def __init__(self, ttl_s=SETTINGS_TTL_S, cache_path=SETTINGS_CACHE_PATH):
+        self.ttl_s = ttl_s
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._settings = self._load_cache()
+
+    def _load_cache(self):
+        try:
+            if self.cache_path.exists():
+                data = json.loads(self.cache_path.read_text())
+                return CredentialSettings(data.get("column_b"), data.get("fetched_at", 0.0))
+        except Exception as e:
+            logging.warning("Settings: failed to read cache %s: %s", self.cache_path, e)
+        return None
+
+    def _save_cache(self, settings):
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(self.cache_path.name + ".tmp")
+            tmp_path.write_text(json.dumps({"column_b": settings.column_b,
+                                            "fetched_at": settings.fetched_at}))
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            logging.warning("Settings: failed to write cache %s: %s", self.cache_path, e)
+
+    def refresh(self):
+        """Fetch the whole Credentials column in one request."""
+        ws = get_session().worksheet(GS_CRED_TAB)
+        ranges = ws.batch_get([SETTINGS_RANGE])
+        rows = ranges[0] if ranges else []
+        column_b = [(r[0] if r else "") for r in rows]
+        settings = CredentialSettings(column_b, time.time())
+        with self._lock:
+            self._settings = settings
+        self._save_cache(settings)
+        logging.info("Settings: refreshed %d Credentials cells", len(column_b))
+        return settings
+
+    def get(self, allow_stale=False):
+        """
+        Return cached settings, refreshing only if older than the TTL.
+        With allow_stale=True never touches the network (may return empty settings).
+        """
+        with self._lock:
+            settings = self._settings
+        if settings is not None and (allow_stale or settings.age() < self.ttl_s):
+            return settings
+        if allow_stale:
+            return CredentialSettings()
+        try:
+            return self.refresh()
+        except Exception as e:
+            logging.error("Settings: refresh failed, using cached values: %s", e)
+            return settings or CredentialSettings()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_settings_store():
+    """Return the process-wide SettingsStore."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SettingsStore()
+        return _store
+
+
+def get_settings(allow_stale=False):
+    return get_settings_store().get(allow_stale=allow_stale)
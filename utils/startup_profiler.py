@@ -0,0 +1,122 @@
+# utils/startup_profiler.py
+import importlib.abc
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Wraps a real loader to time module execution, then restores the original."""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter_import(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit_import(module.__name__)
+            # Put the real loader back so nothing downstream sees the wrapper
+            module.__loader__ = self._loader
+            if getattr(module, "__spec__", None) is not None:
+                module.__spec__.loader = self._loader
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Meta path hook that wraps the loader of every main-thread import."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        if threading.current_thread() is not threading.main_thread():
+            return None
+        for finder in sys.meta_path:
+            if finder is self:
+                continue
+            find_spec = getattr(finder, "find_spec", None)
+            if find_spec is None:
+                continue
+            spec = find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self.profiler)
+        return spec
+
+
+class StartupProfiler:
+    """
+    Records time spent per import and per init stage during boot.
+    Imports are timed with a meta path hook (self time, i.e. excluding nested
+    imports); stages are timed with the stage() context manager.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.stages = []   # [(name, seconds)]
+        self.imports = {}  # module name -> (inclusive seconds, self seconds)
+        self._stack = []   # [[name, start, child seconds]]
+        self._finder = None
+
+    def install_import_hook(self):
+        if self._finder is None:
+            self._finder = _ImportTimer(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def remove_import_hook(self):
+        if self._finder is not None:
+            try:
+                sys.meta_path.remove(self._finder)
+            except ValueError:
+                pass
+            self._finder = None
+
+    def _enter_import(self, name):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _exit_import(self, name):
+        if not self._stack:
+            return
+        frame_name, start, children = self._stack.pop()
+        inclusive = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][2] += inclusive
+        self.imports[frame_name] = (inclusive, inclusive - children)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def mark(self, name):
+        """Record a point in time relative to process start as a stage."""
+        self.stages.append((name, time.perf_counter() - self.t0))
+
+    def report(self, top=15):
+        """Log init stages in order and the slowest imports by self time."""
+        total = time.perf_counter() - self.t0
+        logging.info("Startup profile: %.0f ms since start", total * 1000)
+        for name, seconds in self.stages:
+            logging.info("  stage  %-28s %8.1f ms", name, seconds * 1000)
+        slowest = sorted(self.imports.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        for name, (inclusive, own) in slowest:
+            logging.info("  import %-28s %8.1f ms self  %8.1f ms total", name, own * 1000, inclusive * 1000)
+
+
+profiler = StartupProfiler()
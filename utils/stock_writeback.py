@@ -0,0 +1,174 @@
+# utils/stock_writeback.py
+import json
+import logging
+import os
+import threading
+
+from config import GS_TAB, STOCK_PENDING_PATH, STOCK_PUSH_INTERVAL_S
+from models.product import COL_QTY, COL_UPC, parse_qty
+from utils.catalog_delta import row_key
+from utils.google_session import get_session
+from utils.upc_helpers import canonical_gtin
+
+QTY_COL = chr(ord("A") + COL_QTY)  # "K"
+UPC_COL = chr(ord("A") + COL_UPC)  # "A"
+
+
+class StockWriteback:
+    """
+    Subtracts sold quantities from the Inv tab QTY column.
+    record_sale() coalesces per-key decrements in a small JSON file and
+    lowers the catalog's on-hand QTY at once, so price checks show current
+    stock. Every interval_s a worker thread reads the UPC and QTY columns and
+    writes all new values with one batch_update. A key's local override is
+    dropped when a sheet sync brings its row in with nothing still pending.
+    """
+
+    def __init__(self, catalog, path=STOCK_PENDING_PATH, interval_s=STOCK_PUSH_INTERVAL_S,
+                 session=None):
+        self.catalog = catalog
+        self.path = path
+        self.interval_s = interval_s
+        self.session = session or get_session()
+        self._lock = threading.Lock()
+        self._pending = self._load()  # key -> units sold, not yet written to the sheet
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self.stats = {"pushes": 0, "cells_written": 0, "failures": 0, "unmatched": 0}
+        # Decrements left over from the last run still count against the loaded snapshot;
+        # applied once here, before any sheet sync can call _on_delta
+        for key, sold in self._pending.items():
+            qty = catalog.stock(key)
+            if qty is not None:
+                catalog.set_stock(key, qty - sold)
+        catalog.on_delta = self._on_delta
+
+    def _load(self):
+        try:
+            if self.path.exists():
+                with open(self.path, encoding="utf-8") as f:
+                    return {k: int(v) for k, v in json.load(f).items()}
+        except Exception as e:
+            logging.error("Stock: failed to read %s: %s", self.path, e)
+        return {}
+
+    def _save(self):
+        """Atomically persist the pending decrements (caller holds _lock)."""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._pending, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logging.error("Stock: failed to write %s: %s", self.path, e)
+
+    def pending(self):
+        with self._lock:
+            return dict(self._pending)
+
+    # ---- Sales (Tk thread) ----
+    def record_sale(self, items):
+        """Queue decrements for [(key, qty sold)] and update the local on-hand counts."""
+        with self._lock:
+            for key, qty in items:
+                if qty <= 0:
+                    continue
+                self._pending[key] = self._pending.get(key, 0) + qty
+                on_hand = self.catalog.stock(key)
+                if on_hand is not None:
+                    self.catalog.set_stock(key, on_hand - qty)
+            self._save()
+
+    def _on_delta(self, delta):
+        """Sheet sync brought changed rows in: their QTY is the sheet's, less what is still pending."""
+        with self._lock:
+            for row in delta.inserted + [new for _, new in delta.updated]:
+                key = row_key(row)
+                sold = self._pending.get(key)
+                if sold:
+                    qty = parse_qty(row[COL_QTY] if len(row) > COL_QTY else "")
+                    self.catalog.set_stock(key, None if qty is None else qty - sold)
+                else:
+                    self.catalog.set_stock(key, None)
+            for row in delta.deleted:
+                self.catalog.set_stock(row_key(row), None)
+
+    # ---- Push (worker thread) ----
+    def push(self):
+        """Write pending decrements to the sheet in one batch_update. Returns cells written."""
+        with self._lock:
+            batch = dict(self._pending)
+        if not batch:
+            return 0
+        ws = self.session.worksheet(GS_TAB)
+        upcs, qtys = ws.batch_get([f"{UPC_COL}:{UPC_COL}", f"{QTY_COL}:{QTY_COL}"])
+        rows = {}  # key -> 1-based sheet row (last row wins, like the index)
+        for i, cells in enumerate(upcs[1:], start=2):
+            key = canonical_gtin(cells[0] if cells else "")[0]
+            if key:
+                rows[key] = i
+
+        updates, written, unmatched = [], {}, []
+        for key, sold in batch.items():
+            row = rows.get(key)
+            cell = qtys[row - 1] if row and row - 1 < len(qtys) else []
+            current = parse_qty(cell[0] if cell else "")
+            if row is None or current is None:
+                unmatched.append(key)
+                continue
+            written[key] = current - sold
+            updates.append({"range": f"{QTY_COL}{row}", "values": [[written[key]]]})
+        if updates:
+            ws.batch_update(updates, value_input_option="USER_ENTERED")
+
+        with self._lock:
+            for key in list(written) + unmatched:
+                left = self._pending.get(key, 0) - batch[key]
+                if left > 0:
+                    self._pending[key] = left  # sold again while pushing
+                else:
+                    self._pending.pop(key, None)
+                if key in written:
+                    self.catalog.set_stock(key, written[key] - max(left, 0))
+                else:
+                    # Nothing in the sheet to count down from: show the sheet's QTY again
+                    self.catalog.set_stock(key, None)
+            self._save()
+        self.stats["pushes"] += 1
+        self.stats["cells_written"] += len(updates)
+        self.stats["unmatched"] += len(unmatched)
+        if unmatched:
+            logging.warning("Stock: dropped decrements and overrides for %d keys with no row or no QTY: %s",
+                            len(unmatched), ", ".join(unmatched[:5]))
+        logging.info("Stock: wrote QTY for %d products", len(updates))
+        return len(updates)
+
+    def start(self):
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="stock", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the worker; pending decrements stay on disk for the next run."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped:
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            if self._stopped:
+                break
+            try:
+                self.push()
+            except Exception as e:
+                self.stats["failures"] += 1
+                logging.warning("Stock: QTY write-back failed, will retry: %s", e)
@@ -0,0 +1,91 @@
+# utils/store_hours.py
+import csv
+import logging
+from datetime import datetime
+
+from config import STORE_HOURS_PATH
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+def _parse_day(cell):
+    s = (cell or "").strip().lower()
+    if len(s) < 3:
+        return None
+    for i, day in enumerate(DAYS):
+        if day.startswith(s) or s.startswith(day[:3]):
+            return i
+    return None
+
+
+def _parse_time(cell):
+    """'9:00 AM', '9am', '21:30', '0900' -> datetime.time; None if not a time."""
+    s = (cell or "").strip().lower().replace(".", "").replace(" ", "")
+    if not s:
+        return None
+    for fmt in ("%I:%M%p", "%I%p", "%H:%M", "%H%M", "%H"):
+        try:
+            return datetime.strptime(s, fmt).time()
+        except ValueError:
+            continue
+    return None
+
+
+class StoreHours:
+    """
+    Weekly opening hours from the Hours tab download (store_hours.csv).
+    Rows are 'Day, Open, Close'; a day marked Closed (or missing) has no hours,
+    and a close time before the open time runs past midnight. Reloaded when the
+    file changes. With no usable file the store counts as always open.
+    """
+
+    def __init__(self, path=STORE_HOURS_PATH):
+        self.path = path
+        self._mtime = None
+        self._hours = {}  # weekday -> (open, close) or None when closed all day
+
+    def _reload(self):
+        try:
+            mtime = self.path.stat().st_mtime if self.path.exists() else None
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        self._hours = {}
+        if mtime is None:
+            return
+        try:
+            with open(self.path, newline='', encoding='utf-8') as f:
+                for vals in csv.reader(f):
+                    day = _parse_day(vals[0]) if vals else None
+                    if day is None:
+                        continue  # header or notes
+                    opens = _parse_time(vals[1]) if len(vals) > 1 else None
+                    closes = _parse_time(vals[2]) if len(vals) > 2 else None
+                    self._hours[day] = (opens, closes) if opens and closes else None
+        except Exception as e:
+            logging.error("Store hours: failed to read %s: %s", self.path, e)
+            self._hours = {}
+        logging.info("Store hours: loaded %d days from %s", len(self._hours), self.path.name)
+
+    def is_open(self, when=None):
+        self._reload()
+        if not self._hours:
+            return True
+        when = when or datetime.now()
+        t = when.time()
+        today = self._hours.get(when.weekday())
+        if today:
+            opens, closes = today
+            if opens <= closes and opens <= t < closes:
+                return True
+            if closes < opens and t >= opens:
+                return True
+        # Yesterday's hours may run past midnight
+        yesterday = self._hours.get((when.weekday() - 1) % 7)
+        if yesterday:
+            opens, closes = yesterday
+            if closes < opens and t < closes:
+                return True
+        return False
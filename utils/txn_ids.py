@@ -0,0 +1,136 @@
+# utils/txn_ids.py
+import logging
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from config import TXN_SEQ_DB_PATH, LEGACY_TXN_COUNT_DIR
+
+_LEGACY_RE = re.compile(r"^transaction_count_(\d{5})\.txt$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS txn_seq (
+    day  TEXT PRIMARY KEY,   -- YYDDD
+    last INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+KEEP_DAYS = 40  # sequence rows kept; older days can never be allocated again
+
+
+def day_code(when=None):
+    """YYDDD for a datetime (default now), e.g. 25236."""
+    when = when or datetime.now()
+    return f"{when:%y}{int(when.strftime('%j')):03d}"
+
+
+class TransactionIdAllocator:
+    """
+    Hands out YYDDD### transaction IDs from a per-day sequence in SQLite.
+    Each allocation is an UPSERT plus a read-back in one BEGIN IMMEDIATE
+    transaction (no RETURNING, so older SQLite builds work), in WAL mode with
+    synchronous=FULL, so an ID is on disk before it is handed out and a power
+    cut can never make the sequence go backwards. SQLite's write lock
+    serializes allocators in other threads or processes.
+    """
+
+    def __init__(self, path=TXN_SEQ_DB_PATH, legacy_dir=LEGACY_TXN_COUNT_DIR):
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=5, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+        if legacy_dir:
+            self._import_legacy(legacy_dir)
+
+    def _import_legacy(self, legacy_dir):
+        """Fold old transaction_count_YYDDD.txt files into the table, then delete them."""
+        if not legacy_dir.exists():
+            return
+        found = []
+        for p in legacy_dir.iterdir():
+            m = _LEGACY_RE.match(p.name)
+            if not m:
+                continue
+            try:
+                found.append((m.group(1), int(p.read_text().strip() or 0), p))
+            except (ValueError, OSError) as e:
+                logging.error(f"Error reading legacy transaction count {p.name}: {e}")
+        if not found:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT INTO txn_seq (day, last) VALUES (?, ?)"
+                    " ON CONFLICT (day) DO UPDATE SET last = max(last, excluded.last)",
+                    [(day, count) for day, count, _ in found])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        for _, _, p in found:
+            try:
+                p.unlink()
+            except OSError as e:
+                logging.error(f"Error removing legacy transaction count {p.name}: {e}")
+        logging.info(f"Imported {len(found)} legacy transaction count files")
+
+    def next_id(self, when=None):
+        """Allocate the next ID for today (or the day of when)."""
+        day = day_code(when)
+        with self._lock:
+            # No RETURNING (SQLite 3.35+): read the new value back inside the same transaction
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO txn_seq (day, last) VALUES (?, 1)"
+                    " ON CONFLICT (day) DO UPDATE SET last = last + 1",
+                    (day,))
+                (last,) = self._conn.execute(
+                    "SELECT last FROM txn_seq WHERE day = ?", (day,)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if last == 1:
+            self._prune(day)
+        return f"{day}{last:03d}"
+
+    def _prune(self, today):
+        """Drop sequence rows more than KEEP_DAYS old (runs once a day, on the first sale)."""
+        try:
+            with self._lock:
+                rows = self._conn.execute("SELECT day FROM txn_seq").fetchall()
+                # YYDDD sorts by date within a century; compare as ordinal days
+                cutoff = _ordinal(today) - KEEP_DAYS
+                old = [(d,) for (d,) in rows if _ordinal(d) < cutoff]
+                if old:
+                    self._conn.executemany("DELETE FROM txn_seq WHERE day = ?", old)
+        except Exception as e:
+            logging.error(f"Error pruning transaction sequence: {e}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def _ordinal(day):
+    return datetime.strptime(day, "%y%j").toordinal()
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def get_txn_allocator():
+    """Return the process-wide transaction ID allocator, opening it on first use."""
+    global _allocator
+    with _allocator_lock:
+        if _allocator is None:
+            _allocator = TransactionIdAllocator()
+        return _allocator
@@ -0,0 +1,86 @@
+# utils/unknown_scans.py
+import csv
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from config import UNKNOWN_SCANS_PATH, UNKNOWN_SCANS_FLUSH_S
+
+HEADERS = ["Key", "Scanned As", "Count", "First Seen", "Last Seen"]
+
+
+class UnknownScanLog:
+    """
+    Per-UPC counts of scans that matched nothing in the catalog.
+    Kept in a small CSV (most-scanned first) that admins export to fix the sheet.
+    Rewrites are throttled to one per flush_s; call flush() on shutdown.
+    """
+
+    def __init__(self, path=UNKNOWN_SCANS_PATH, flush_s=UNKNOWN_SCANS_FLUSH_S):
+        self.path = path
+        self.flush_s = flush_s
+        self._lock = threading.Lock()
+        self._entries = self._load()  # key -> [scanned as, count, first seen, last seen]
+        self._dirty = False
+        self._last_write = 0.0
+
+    def _load(self):
+        entries = {}
+        try:
+            if self.path.exists():
+                with open(self.path, newline='', encoding='utf-8') as f:
+                    reader = csv.reader(f)
+                    if next(reader, None) != HEADERS:
+                        logging.warning("Unknown scans: unexpected header in %s, starting fresh", self.path)
+                        return {}
+                    for vals in reader:
+                        if len(vals) >= 5:
+                            entries[vals[0]] = [vals[1], int(vals[2] or 0), vals[3], vals[4]]
+        except Exception as e:
+            logging.error("Unknown scans: failed to read %s: %s", self.path, e)
+        return entries
+
+    def record(self, key, scanned_as):
+        """Count one unknown scan; returns how many times this key has been seen."""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [scanned_as, 0, now, now]
+            entry[0] = scanned_as
+            entry[1] += 1
+            entry[3] = now
+            self._dirty = True
+            count = entry[1]
+        if time.monotonic() - self._last_write >= self.flush_s:
+            self.flush()
+        return count
+
+    def rows(self):
+        """Header plus one row per key, most-scanned first."""
+        with self._lock:
+            items = sorted(self._entries.items(), key=lambda kv: kv[1][1], reverse=True)
+        return [HEADERS] + [[key, raw, str(count), first, last] for key, (raw, count, first, last) in items]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def flush(self):
+        """Write the file if anything changed since the last write."""
+        with self._lock:
+            if not self._dirty:
+                return
+            self._dirty = False
+        rows = self.rows()
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows(rows)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self._dirty = True
+            logging.error("Unknown scans: failed to write %s: %s", self.path, e)
+        self._last_write = time.monotonic()
@@ -74,3 +74,35 @@ def upc_variants_from_scan(scan: str):
             add(t[1:])
 
     return variants
+
+GTIN_LEN = 14
+
+def gtin_check_digit(body: str) -> int:
+    """GS1 mod-10 check digit for the digits that precede it."""
+    total = 0
+    for i, ch in enumerate(reversed(body)):
+        total += int(ch) * (3 if i % 2 == 0 else 1)
+    return (10 - total % 10) % 10
+
+def is_valid_gtin(digits: str) -> bool:
+    """True for an 8..14 digit UPC/EAN/GTIN whose last digit is a correct check digit."""
+    if not digits.isdigit() or not 8 <= len(digits) <= GTIN_LEN:
+        return False
+    return gtin_check_digit(digits[:-1]) == int(digits[-1])
+
+def canonical_gtin(value: str):
+    """
+    Canonical catalog key for a sheet UPC or a scan.
+    Numeric codes are zero-padded to GTIN-14, so UPC-A, EAN-13, GTIN-14 and a
+    sheet cell that lost its leading zero all map to the same single key.
+    Anything else (letters, more than 14 digits) keys on its stripped raw value.
+    Returns (key, valid) where valid means the GS1 check digit is correct.
+    """
+    raw = (value or "").strip()
+    dig = _digits_only(raw)
+    if not dig or len(dig) > GTIN_LEN or dig != raw.replace(" ", "").replace("-", ""):
+        return raw, False
+    key = dig.zfill(GTIN_LEN)
+    # Leading zeros carry no check-digit weight, so the padded key validates
+    # exactly like the printed code (and an 11-digit cell like its UPC-A)
+    return key, len(dig) >= 8 and is_valid_gtin(key)
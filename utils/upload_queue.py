@@ -0,0 +1,215 @@
+# utils/upload_queue.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from config import (UPLOAD_QUEUE_PATH, UPLOAD_BATCH_SIZE, UPLOAD_FLUSH_INTERVAL_S,
+                    UPLOAD_BACKOFF_MAX_S, UPLOAD_QUEUE_MAX_ROWS, UPLOAD_QUEUE_MAX_AGE_S)
+from utils.google_session import get_session
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id  INTEGER PRIMARY KEY AUTOINCREMENT,
+    tab TEXT NOT NULL,
+    row TEXT NOT NULL,  -- JSON list of cell values
+    queued_at REAL NOT NULL DEFAULT 0
+);
+"""
+
+NEW_TAB_ROWS = 1000  # initial size of a tab created for queued rows
+
+
+class UploadQueue:
+    """
+    Outbound queue of rows for Sheets tabs (sales, scans, service events).
+    enqueue() only inserts into a local SQLite outbox, so checkout never waits
+    on the network. A worker thread uploads queued rows every flush_interval_s
+    with one append_rows per tab and batch, deletes them once Sheets accepted
+    them, and backs off exponentially (up to backoff_max_s) while offline.
+    A missing tab is created; a tab that still fails is skipped for that round
+    so it never holds up the others. Rows survive restarts, up to max_rows or
+    max_age_s (oldest dropped first, with a warning); delivery is at-least-once
+    (a crash between the upload and the delete resends that batch).
+    """
+
+    def __init__(self, path=UPLOAD_QUEUE_PATH, batch_size=UPLOAD_BATCH_SIZE,
+                 flush_interval_s=UPLOAD_FLUSH_INTERVAL_S, backoff_max_s=UPLOAD_BACKOFF_MAX_S,
+                 max_rows=UPLOAD_QUEUE_MAX_ROWS, max_age_s=UPLOAD_QUEUE_MAX_AGE_S, session=None):
+        self.path = path
+        self.max_rows = max_rows
+        self.max_age_s = max_age_s
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.backoff_max_s = backoff_max_s
+        self.session = session or get_session()
+        self._lock = threading.Lock()     # guards the connection
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+        self._failures = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), timeout=5, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        columns = [c[1] for c in self._conn.execute("PRAGMA table_info(outbox)")]
+        if "queued_at" not in columns:
+            self._conn.execute("ALTER TABLE outbox ADD COLUMN queued_at REAL NOT NULL DEFAULT 0")
+        self.stats = {"enqueued": 0, "uploaded": 0, "batches": 0, "failures": 0,
+                      "tabs_created": 0, "dropped": 0}
+
+    # ---- Producers (any thread) ----
+    def enqueue(self, tab, row):
+        """Queue one row for tab; returns immediately."""
+        try:
+            with self._lock:
+                self._conn.execute("INSERT INTO outbox (tab, row, queued_at) VALUES (?, ?, ?)",
+                                   (tab, json.dumps(row, ensure_ascii=False), time.time()))
+            self.stats["enqueued"] += 1
+        except Exception as e:
+            logging.error(f"Upload queue: failed to queue row for {tab}: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    # ---- Worker ----
+    def start(self):
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="uploads", daemon=True)
+            self._thread.start()
+            logging.info(f"Upload queue: started with {len(self)} queued rows")
+
+    def stop(self):
+        """Stop the worker; queued rows stay on disk for the next run."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def flush_now(self):
+        """Ask the worker to upload now instead of at the next interval."""
+        self._failures = 0
+        self._wake.set()
+
+    def _tabs(self):
+        """Tabs with queued rows, the one with the oldest row first."""
+        with self._lock:
+            return [tab for (tab,) in self._conn.execute(
+                "SELECT tab FROM outbox GROUP BY tab ORDER BY MIN(id)")]
+
+    def _next_batch(self, tab):
+        """[(id, row)] of the oldest queued rows for tab, in queue order."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT id, row FROM outbox WHERE tab = ? ORDER BY id LIMIT ?",
+                (tab, self.batch_size))
+            return [(rid, json.loads(row)) for rid, row in cur]
+
+    def _worksheet(self, tab, width):
+        """The tab's worksheet, created (like the admin Unknown Scans export) if missing."""
+        from gspread.exceptions import WorksheetNotFound
+        try:
+            return self.session.worksheet(tab)
+        except WorksheetNotFound:
+            self.session.spreadsheet().add_worksheet(title=tab, rows=NEW_TAB_ROWS, cols=max(width, 1))
+            self.stats["tabs_created"] += 1
+            logging.info(f"Upload queue: created missing tab {tab}")
+            return self.session.worksheet(tab)
+
+    def _upload_tab(self, tab):
+        uploaded = 0
+        while not self._stopped:
+            batch = self._next_batch(tab)
+            if not batch:
+                break
+            ws = self._worksheet(tab, max(len(row) for _, row in batch))
+            ws.append_rows([row for _, row in batch], value_input_option="USER_ENTERED")
+            with self._lock:
+                self._conn.execute("DELETE FROM outbox WHERE id <= ? AND tab = ?", (batch[-1][0], tab))
+            uploaded += len(batch)
+            self.stats["uploaded"] += len(batch)
+            self.stats["batches"] += 1
+        return uploaded
+
+    def upload_pending(self):
+        """
+        Upload every queued batch, tab by tab. A failing tab is skipped so the
+        others still go out; raises afterwards if any tab failed. Returns rows uploaded.
+        """
+        uploaded, failed = 0, []
+        for tab in self._tabs():
+            if self._stopped:
+                break
+            try:
+                uploaded += self._upload_tab(tab)
+            except Exception as e:
+                failed.append(tab)
+                logging.warning(f"Upload queue: tab {tab} failed, skipping it this round: {e}")
+        if failed:
+            if uploaded:
+                logging.info(f"Upload queue: uploaded {uploaded} rows")
+            raise RuntimeError(f"{len(failed)} tab(s) failed: {', '.join(failed)}")
+        return uploaded
+
+    def trim(self):
+        """Drop rows past the age or size cap (oldest first); returns how many were dropped."""
+        with self._lock:
+            dropped = self._conn.execute(
+                "DELETE FROM outbox WHERE queued_at > 0 AND queued_at < ?",
+                (time.time() - self.max_age_s,)).rowcount
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()
+            if count > self.max_rows:
+                dropped += self._conn.execute(
+                    "DELETE FROM outbox WHERE id IN (SELECT id FROM outbox ORDER BY id LIMIT ?)",
+                    (count - self.max_rows,)).rowcount
+        if dropped:
+            self.stats["dropped"] += dropped
+            logging.warning(f"Upload queue: dropped {dropped} rows over the cap "
+                            f"({self.max_rows} rows / {self.max_age_s // 86400} days)")
+        return dropped
+
+    def _run(self):
+        while not self._stopped:
+            if self._failures:
+                delay = min(self.flush_interval_s * 2 ** self._failures, self.backoff_max_s)
+            else:
+                delay = self.flush_interval_s
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stopped:
+                break
+            try:
+                self.trim()
+                uploaded = self.upload_pending()
+                if uploaded:
+                    logging.info(f"Upload queue: uploaded {uploaded} rows")
+                self._failures = 0
+            except Exception as e:
+                self._failures += 1
+                self.stats["failures"] += 1
+                logging.warning(f"Upload queue: upload failed ({self._failures} in a row), "
+                                f"{len(self)} rows queued: {e}")
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._conn.close()
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_upload_queue():
+    """Return the process-wide upload queue, opening it on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = UploadQueue()
+        return _queue